@@ -0,0 +1,128 @@
+"""Cycle finding for puzzles that repeat a state transition until it loops.
+
+Days 12, 18 and 21 all boil down to applying the same function over and over until the
+states start repeating. Rather than keeping every state seen in a set, these use Brent's
+algorithm, which only ever holds on to a couple of states, so long periods stay cheap.
+
+https://en.wikipedia.org/wiki/Cycle_detection#Brent's_algorithm
+"""
+
+from typing import Callable, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def _loop_length(step: Callable[[T], T], start: T, limit: int = -1) -> Tuple[int, int, T]:
+    """The first half of Brent's algorithm, which finds the loop length but not where the loop starts.
+
+    Arguments:
+        step {Callable[[T], T]} -- The state transition function.
+        start {T} -- The first state.
+
+    Keyword Arguments:
+        limit {int} -- Give up once this many steps have been taken, or -1 to keep going (default: {-1})
+
+    Returns:
+        Tuple[int, int, T] -- (index, lam, state) where state is the one at index, which is somewhere in the loop.
+            lam is 0 if the limit was reached first.
+    """
+
+    # Race the hare ahead and teleport the tortoise to it at each power of two.
+    power = lam = index = 1
+    tortoise = start
+    hare = step(start)
+    while tortoise != hare:
+        if index == limit:
+            return index, 0, hare
+        if power == lam:
+            tortoise = hare
+            power *= 2
+            lam = 0
+        hare = step(hare)
+        lam += 1
+        index += 1
+    return index, lam, hare
+
+
+def find_cycle(step: Callable[[T], T], start: T) -> Tuple[int, int, T]:
+    """Finds where the sequence start, step(start), step(step(start)), ... starts looping.
+
+    The sequence has to loop eventually, otherwise this never returns.
+
+    Arguments:
+        step {Callable[[T], T]} -- The state transition function.
+        start {T} -- The first state.
+
+    Returns:
+        Tuple[int, int, T] -- (mu, lam, state) the index of the first state in the loop, the loop length,
+            and the first state in the loop, so callers can carry on from there without replaying the lead in.
+    """
+
+    _, lam, _ = _loop_length(step, start)
+
+    # With the hare a whole loop ahead, they first meet where the loop starts.
+    tortoise = hare = start
+    for _ in range(lam):
+        hare = step(hare)
+    mu = 0
+    while tortoise != hare:
+        tortoise = step(tortoise)
+        hare = step(hare)
+        mu += 1
+    return mu, lam, tortoise
+
+
+def iterate(step: Callable[[T], T], start: T, count: int) -> T:
+    """Applies `step` to `start` `count` times.
+
+    Arguments:
+        step {Callable[[T], T]} -- The state transition function.
+        start {T} -- The first state.
+        count {int} -- How many steps to take.
+
+    Returns:
+        T -- The resulting state.
+    """
+
+    state = start
+    for _ in range(count):
+        state = step(state)
+    return state
+
+
+def nth_state(step: Callable[[T], T], start: T, n: int) -> T:
+    """Gets the state after `n` steps, skipping over every full trip around the loop.
+
+    Where the loop starts doesn't matter here, so this only needs the first half of Brent's algorithm,
+    and carries on from wherever the hare is once the loop length is known.
+
+    Arguments:
+        step {Callable[[T], T]} -- The state transition function.
+        start {T} -- The first state.
+        n {int} -- Number of steps, this can be far larger than could ever be simulated.
+
+    Returns:
+        T -- The state after `n` steps.
+    """
+
+    if n <= 0:
+        return start
+    index, lam, state = _loop_length(step, start, n)
+    if not lam:
+        return state
+    return iterate(step, state, (n - index) % lam)
+
+
+def last_before_repeat(step: Callable[[T], T], start: T) -> T:
+    """Gets the last new state before the sequence revisits one it has already seen.
+
+    Arguments:
+        step {Callable[[T], T]} -- The state transition function.
+        start {T} -- The first state.
+
+    Returns:
+        T -- The state right before the sequence starts repeating.
+    """
+
+    _, lam, looped = find_cycle(step, start)
+    return iterate(step, looped, lam - 1)
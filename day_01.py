@@ -58,24 +58,59 @@ Your puzzle answer was 56360.
 """
 
 import itertools
-from typing import Sequence, Set
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
-with open('day_01.input', 'r') as f:
-    vals: Sequence[int] = list(map(int, f.readlines()))
+from loaders import load_ints
+
+vals: Sequence[int] = load_ints('day_01.input')
 
 
 def problem_01(data: Sequence[int]) -> int:
     return sum(data)
 
 def problem_02(data: Sequence[int]) -> int:
-    current = 0
-    freq: Set[int] = {current}
-    for val in itertools.cycle(data):
-        current += val
-        if current in freq:
-            break
-        freq.add(current)
-    return current
+    """Finds the first frequency reached twice, without walking through every cycle.
+    
+    Every frequency is one of the first cycle's running totals, shifted by a whole number of cycle totals.
+    So a later cycle can only land on an earlier frequency with the same remainder modulo the total,
+    and within each remainder the nearest frequency in the direction of the drift gets there first.
+    
+    Arguments:
+        data {Sequence[int]} -- The frequency changes.
+    
+    Raises:
+        ValueError -- If no frequency is ever reached twice.
+    
+    Returns:
+        int -- The first frequency reached twice.
+    """
+
+    frequencies = list(itertools.accumulate(data, initial=0))
+    total = frequencies.pop()
+    seen: Set[int] = set()
+    for freq in frequencies:
+        if freq in seen:
+            return freq
+        seen.add(freq)
+    if total == 0:
+        # With no drift, the second cycle starts where the first one did.
+        return 0
+
+    groups: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    for idx, freq in enumerate(frequencies):
+        groups[freq % total].append((freq, idx))
+    best: Optional[Tuple[int, int]] = None
+    for group in groups.values():
+        group.sort(reverse=total < 0)
+        for (start, idx), (target, _) in zip(group, group[1:]):
+            # Steps until the frequency at idx drifts onto the target.
+            steps = (target - start) // total * len(data) + idx
+            if best is None or steps < best[0]:
+                best = steps, target
+    if best is None:
+        raise ValueError('No frequency is ever reached twice.')
+    return best[1]
 
 print(problem_01(vals))
 print(problem_02(vals))
@@ -49,39 +49,91 @@ Your puzzle answer was pazvmqbftrbeosiecxlghkwud.
 
 """
 
-import itertools
-from collections import Counter
-from typing import Sequence, Optional, List
+from typing import AnyStr, Iterable, Sequence, Set, Tuple
 
 with open('day_02.input', 'r') as f:
     vals: Sequence[str] = list(f.readlines())
 
 
-def part_01(data: Sequence[str]) -> int:
-    threes = 0
+def letter_flags(box: AnyStr) -> Tuple[bool, bool]:
+    """Checks whether an ID has any letter exactly twice, and any letter exactly three times.
+    
+    Arguments:
+        box {AnyStr} -- The box ID, without its line ending.
+    
+    Returns:
+        Tuple[bool, bool] -- (has a pair, has a triple)
+    """
+
+    counts = {box.count(c) for c in set(box)}
+    return 2 in counts, 3 in counts
+
+
+def checksum(boxes: Iterable[AnyStr]) -> int:
+    """Multiplies the number of IDs with a pair by the number with a triple.
+    Line endings are stripped first, so IDs can come straight from a file.
+    
+    Arguments:
+        boxes {Iterable[AnyStr]} -- The box IDs.
+    
+    Returns:
+        int -- The checksum.
+    """
+
     twos = 0
-    for line in data:
-        c = Counter(line)
-        if 3 in c.values():
-            threes += 1
-        if 2 in c.values():
-            twos += 1
+    threes = 0
+    for box in boxes:
+        two, three = letter_flags(box.strip())
+        twos += two
+        threes += three
     return twos * threes
 
 
+def checksum_file(path: str, stream: bool = False) -> int:
+    """Checksums an ID file.
+    
+    Arguments:
+        path {str} -- The ID file.
+    
+    Keyword Arguments:
+        stream {bool} -- Read one line at a time, for files that don't fit in memory (default: {False})
+    
+    Returns:
+        int -- The checksum.
+    """
+
+    with open(path, 'rb') as f:
+        if stream:
+            return checksum(f)
+        # Splitting the whole file at once drops the line endings and any blank lines in one go.
+        return checksum(f.read().split())
+
+
+def part_01(data: Sequence[str]) -> int:
+    return checksum(data)
+
+
 def part_02(data: Sequence[str]) -> str:
-    for pair in itertools.permutations(data, 2):
-        count = 0
-        match: List[str] = []
-        for j, k in zip(*pair):
-            if j != k:
-                count += 1
-                if count > 1:
-                    break
-            else:
-                match.append(j)
-        else:
-            return ''.join(match)
+    """Finds the common letters of the two IDs that differ by exactly one character.
+    For each position, every ID is keyed by itself with that character removed,
+    so the pair shows up as the first key seen twice.
+    
+    Arguments:
+        data {Sequence[str]} -- The box IDs.
+    
+    Returns:
+        str -- The letters the two IDs have in common.
+    """
+
+    ids = [line.strip() for line in data if line.strip()]
+    for i in range(max(map(len, ids), default=0)):
+        seen: Set[str] = set()
+        for box in ids:
+            if i < len(box):
+                key = box[:i] + box[i + 1:]
+                if key in seen:
+                    return key
+                seen.add(key)
     return ''
 
 
@@ -60,32 +60,218 @@ Your puzzle answer was 943.
 
 import re
 from collections import defaultdict
-from itertools import product
-from typing import Sequence, Dict, Tuple
+from itertools import chain, product
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 Coordinate = Tuple[int, int]
 Rect = Tuple[int, int, int, int]
 
 with open('day_03.input', 'r') as f:
     vals: Sequence[str] = list(f.readlines())
 
-fabric: Dict[Coordinate, int] = defaultdict(int)
-rects: Dict[int, Rect] = {}
 
-def part_01(vals: Sequence[str]) -> int:
+class CoverTree:
+    """Segment tree over the gaps between sorted edges, tracking how much of the line
+    is covered by at least one, and at least two, of the intervals added so far.
+    """
+
+    def __init__(self, edges: Sequence[int]):
+        self.edges = edges
+        size = 4 * max(len(edges), 1)
+        self.count: List[int] = [0] * size
+        self.once: List[int] = [0] * size
+        self.twice: List[int] = [0] * size
+
+    @property
+    def covered_twice(self) -> int:
+        """Length of the line covered by at least two intervals."""
+        return self.twice[1]
+
+    def add(self, lo: int, hi: int, delta: int, node: int = 1, left: int = 0, right: int = -1):
+        """Adds (or with a negative delta removes) an interval.
+        
+        Arguments:
+            lo {int} -- Index of the interval's first edge.
+            hi {int} -- Index of the interval's last edge.
+            delta {int} -- +1 to add the interval, -1 to remove it.
+        """
+
+        if right < 0:
+            right = len(self.edges) - 1
+        if hi <= left or right <= lo:
+            return
+        if lo <= left and right <= hi:
+            self.count[node] += delta
+        else:
+            mid = (left + right) // 2
+            self.add(lo, hi, delta, 2 * node, left, mid)
+            self.add(lo, hi, delta, 2 * node + 1, mid, right)
+        self._update(node, left, right)
+
+    def _update(self, node: int, left: int, right: int):
+        count = self.count[node]
+        full = self.edges[right] - self.edges[left]
+        leaf = right - left == 1
+        if count >= 2:
+            self.once[node] = self.twice[node] = full
+        elif count == 1:
+            self.once[node] = full
+            # Anything covered once below is now covered twice.
+            self.twice[node] = 0 if leaf else self.once[2 * node] + self.once[2 * node + 1]
+        elif leaf:
+            self.once[node] = self.twice[node] = 0
+        else:
+            self.once[node] = self.once[2 * node] + self.once[2 * node + 1]
+            self.twice[node] = self.twice[2 * node] + self.twice[2 * node + 1]
+
+
+def overlap_area(rects: Iterable[Rect]) -> int:
+    """Finds the area covered by two or more rectangles, by sweeping a line across x.
+    Only the rectangle edges are ever visited, so this doesn't care how big the rectangles are.
+    
+    Arguments:
+        rects {Iterable[Rect]} -- (x, y, width, height) rectangles.
+    
+    Returns:
+        int -- The overlapping area.
+    """
+
+    events: List[Tuple[int, int, int, int]] = []
+    ys: Set[int] = set()
+    for x, y, w, h in rects:
+        if w and h:
+            events.append((x, 1, y, y + h))
+            events.append((x + w, -1, y, y + h))
+            ys.update((y, y + h))
+    if not events:
+        return 0
+    edges = sorted(ys)
+    index = {y: i for i, y in enumerate(edges)}
+    tree = CoverTree(edges)
+    events.sort()
+    area = 0
+    last_x = events[0][0]
+    for x, delta, top, bottom in events:
+        area += tree.covered_twice * (x - last_x)
+        last_x = x
+        tree.add(index[top], index[bottom], delta)
+    return area
+
+
+def overlaps(a: Rect, b: Rect) -> bool:
+    """Checks whether two (x, y, width, height) rectangles share any area."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah and aw > 0 < ah and bw > 0 < bh
+
+
+# Claims that would cover more buckets than this are kept to one side and compared directly instead.
+MAX_BUCKETS = 16
+
+
+class ClaimIndex:
+    """Buckets claims into a coarse grid, so only claims sharing a bucket need comparing.
+
+    A handful of huge claims would otherwise fill a huge number of buckets,
+    so those are compared against every other claim directly.
+    """
+
+    def __init__(self, rects: Dict[int, Rect], cell_size: Optional[int] = None):
+        """
+        Arguments:
+            rects {Dict[int, Rect]} -- (x, y, width, height) of each claim.
+        
+        Keyword Arguments:
+            cell_size {Optional[int]} -- Bucket width and height (default: {None} the median claim's longest side)
+        """
+
+        self.rects = rects
+        if cell_size is None:
+            # The median, so a few huge claims don't blow up the buckets for everyone else.
+            sides = sorted(max(w, h) for _, _, w, h in rects.values())
+            cell_size = max(1, sides[len(sides) // 2] if sides else 1)
+        self.cell_size = cell_size
+        self.buckets: Dict[Coordinate, List[int]] = defaultdict(list)
+        self.large: List[int] = []
+        for idx, rect in rects.items():
+            columns, rows = self._span(rect)
+            if len(columns) * len(rows) > MAX_BUCKETS:
+                self.large.append(idx)
+            else:
+                for cell in product(columns, rows):
+                    self.buckets[cell].append(idx)
+
+    def _span(self, rect: Rect) -> Tuple[range, range]:
+        x, y, w, h = rect
+        if w <= 0 or h <= 0:
+            return range(0), range(0)
+        size = self.cell_size
+        return range(x // size, (x + w - 1) // size + 1), range(y // size, (y + h - 1) // size + 1)
+
+    def _overlapping(self, idx: int) -> Iterator[int]:
+        rect = self.rects[idx]
+        columns, rows = self._span(rect)
+        if len(columns) * len(rows) > MAX_BUCKETS:
+            candidates: Iterable[int] = self.rects
+        else:
+            candidates = chain(chain.from_iterable(self.buckets.get(cell, ()) for cell in product(columns, rows)),
+                               self.large)
+        for other in candidates:
+            if other != idx and overlaps(rect, self.rects[other]):
+                yield other
+
+    def intersecting(self, idx: int) -> Set[int]:
+        """Finds every claim that overlaps claim `idx`.
+        
+        Arguments:
+            idx {int} -- The claim's id.
+        
+        Returns:
+            Set[int] -- Ids of the overlapping claims.
+        """
+
+        return set(self._overlapping(idx))
+
+    def disjoint(self) -> Set[int]:
+        """Finds the claims that don't overlap any other claim.
+        
+        Returns:
+            Set[int] -- Ids of the claims that don't overlap.
+        """
+
+        return {idx for idx in self.rects if next(self._overlapping(idx), None) is None}
+
+
+def parse_claims(vals: Sequence[str]) -> Dict[int, Rect]:
+    """Reads `#id @ x,y: wxh` claims.
+    
+    Arguments:
+        vals {Sequence[str]} -- The claim lines.
+    
+    Returns:
+        Dict[int, Rect] -- (x, y, width, height) of each claim.
+    """
+
+    rects: Dict[int, Rect] = {}
     for line in vals:
-        idx, x, y, w, h = map(int, re.findall(r'\d+', line))
-        rects[idx] = x, y, w, h
-        for i, j in product(range(w), range(h)):
-            fabric[((x+i), (y+j))] += 1
-    return sum(i >= 2 for i in fabric.values())
+        if line.strip():
+            idx, x, y, w, h = map(int, re.findall(r'\d+', line))
+            rects[idx] = x, y, w, h
+    return rects
+
+
+def part_01(vals: Sequence[str]) -> int:
+    return overlap_area(parse_claims(vals).values())
 
 
 def part_02(vals: Sequence[str]) -> int:
-    for idx, (x, y, w, h) in rects.items():
-        if all(fabric[(x+i), (y+j)] == 1 for i, j in product(range(w), range(h))):
-            return idx
-    return -1
+    return min(ClaimIndex(parse_claims(vals)).disjoint(), default=-1)
+
 
+# One huge claim among lots of tiny ones, only the tiny one inside it overlaps anything.
+huge = ['#1 @ 0,0: 10000000x10000000', '#2 @ 5,5: 1x1']
+huge += ['#{} @ {},{}: 1x1'.format(idx, 20000000 + 2 * idx, 3 * idx) for idx in range(3, 3003)]
+assert part_01(huge) == 1
+assert part_02(huge) == 3
 
 print(part_01(vals))
 print(part_02(vals))
@@ -64,31 +64,147 @@ Your puzzle answer was 16164.
 """
 
 
-import re
-from collections import defaultdict, Counter
-from typing import Sequence, Dict
-
-with open('day_04.input', 'r') as f:
-    vals: Sequence[str] = sorted(l[:-1] for l in f.readlines())
-
-guards: Dict[int, Counter] = defaultdict(Counter)
-guard_id = 0
-sleep = 0
-awake = 0
-for v in vals:
-    y, mn, d, h, m, *guard = map(int, re.findall(r'\d+', v))
-    if guard:
-        guard_id = guard[0]
-    elif 'falls asleep' in v:
-        sleep = m
-    elif 'wakes up' in v:
-        awake = m
-        guards[guard_id].update(range(sleep, awake))
-
-guard_id = max(guards, key=lambda x: len(list(guards[x].elements())))
-minute = guards[guard_id].most_common()[0][0]
+import heapq
+from array import array
+from itertools import accumulate
+from typing import Iterable, Iterator, Sequence, Dict, List, Tuple
+
+MINUTES = 60
+# Events are (timestamp, what happened), the timestamp packed as the integer YYYYMMDDhhmm,
+# and what happened is either a guard id starting their shift or one of these.
+ASLEEP = -1
+AWAKE = -2
+Event = Tuple[int, int]
+
+
+def parse_event(line: str) -> Event:
+    """Parses a log line such as `[1518-11-01 00:05] falls asleep`, everything is at a fixed offset.
+    
+    Arguments:
+        line {str} -- The log line.
+    
+    Returns:
+        Event -- (packed timestamp, guard id or ASLEEP or AWAKE)
+    """
+
+    timestamp = int(line[1:5] + line[6:8] + line[9:11] + line[12:14] + line[15:17])
+    if line[19] == 'G':
+        # Guard #10 begins shift
+        return timestamp, int(line[26:line.index(' ', 26)])
+    return timestamp, ASLEEP if line[19] == 'f' else AWAKE
+
+
+def read_shard(path: str) -> Iterator[Event]:
+    """Streams the events of a log file, in the order they're written."""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield parse_event(line)
+
+
+def radix_sort(events: List[Event]) -> List[Event]:
+    """Sorts events by timestamp, a byte at a time from the least significant end.
+    
+    Arguments:
+        events {List[Event]} -- The unsorted events.
+    
+    Returns:
+        List[Event] -- The events in timestamp order, equal timestamps keep their order.
+    """
+
+    largest = max((timestamp for timestamp, _ in events), default=0)
+    shift = 0
+    while largest >> shift:
+        buckets: List[List[Event]] = [[] for _ in range(256)]
+        for event in events:
+            buckets[(event[0] >> shift) & 255].append(event)
+        events = [event for bucket in buckets for event in bucket]
+        shift += 8
+    return events
+
+
+def merge_shards(paths: Iterable[str]) -> Iterator[Event]:
+    """Streams several logs that are each already sorted, as one sorted log.
+    
+    Arguments:
+        paths {Iterable[str]} -- The sorted log files.
+    
+    Returns:
+        Iterator[Event] -- Every event, in timestamp order.
+    """
+
+    return heapq.merge(*map(read_shard, paths))
+
+
+def build_sleep_matrix(events: Iterable[Event]) -> Tuple[List[int], array]:
+    """Counts how often each guard is asleep at each minute of the midnight hour.
+    Each nap only marks where it starts and stops in a difference row, and each guard's
+    row is summed up once at the end, so long naps cost the same as short ones.
+    
+    Arguments:
+        events {Iterable[Event]} -- The events in timestamp order.
+    
+    Returns:
+        Tuple[List[int], array] -- The guard ids, and a flat guards x 60 array('I'), one row per guard in the same order.
+    """
+
+    rows: Dict[int, int] = {}
+    # One extra column, so a nap ending at the top of the hour has somewhere to stop.
+    width = MINUTES + 1
+    diffs = array('i')
+    row = 0
+    sleep = 0
+    for timestamp, event in events:
+        if event == ASLEEP:
+            sleep = timestamp % 100
+        elif event == AWAKE:
+            diffs[row * width + sleep] += 1
+            diffs[row * width + timestamp % 100] -= 1
+        else:
+            row = rows.setdefault(event, len(rows))
+            if len(diffs) == row * width:
+                diffs.frombytes(bytes(diffs.itemsize * width))
+
+    matrix = array('I')
+    for start in range(0, len(diffs), width):
+        matrix.extend(accumulate(diffs[start:start + MINUTES]))
+    return list(rows), matrix
+
+
+def argmax(values: Sequence[int]) -> int:
+    """Index of the first largest value."""
+    return max(range(len(values)), key=values.__getitem__)
+
+
+def most_asleep(guard_ids: List[int], matrix: array) -> Tuple[int, int]:
+    """Strategy 1, the guard asleep the longest in total, and the minute they're most often asleep.
+    
+    Returns:
+        Tuple[int, int] -- (guard id, minute)
+    """
+
+    totals = [sum(matrix[row * MINUTES:(row + 1) * MINUTES]) for row in range(len(guard_ids))]
+    row = argmax(totals)
+    return guard_ids[row], argmax(matrix[row * MINUTES:(row + 1) * MINUTES])
+
+
+def most_regular(guard_ids: List[int], matrix: array) -> Tuple[int, int]:
+    """Strategy 2, the guard asleep on the same minute more often than any other guard on any minute.
+    
+    Returns:
+        Tuple[int, int] -- (guard id, minute)
+    """
+
+    row, minute = divmod(argmax(matrix), MINUTES)
+    return guard_ids[row], minute
+
+
+guard_ids, matrix = build_sleep_matrix(radix_sort(list(read_shard('day_04.input'))))
+# Logs kept as several files that are each in order can skip the sort:
+# guard_ids, matrix = build_sleep_matrix(merge_shards(['day_04.1.input', 'day_04.2.input']))
+
+guard_id, minute = most_asleep(guard_ids, matrix)
 print(guard_id * minute)
 
-guard_id = max(guards, key=lambda x: guards[x].most_common()[0][1])
-minute = guards[guard_id].most_common()[0][0]
+guard_id, minute = most_regular(guard_ids, matrix)
 print(guard_id * minute)
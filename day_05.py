@@ -46,49 +46,113 @@ Your puzzle answer was 4996.
 
 """
 
+import os
 import string
-from typing import Optional
-
-with open('day_05.input', 'r') as f:
-    poly = f.read()
-
-def collapse_polymer(poly: str, kill_symbol: Optional[str] = None) -> str:
-    """Collapses the polymer by walking through the sting backwards, removing pairs.
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+def collapse_polymer(poly: bytes, kill_symbol: Optional[int] = None,
+                     stack: Optional[bytearray] = None) -> bytearray:
+    """Collapses the polymer in a single pass, pushing units onto a stack and
+    popping whenever the next unit reacts with the top of the stack.
+    Units are byte codes, and opposite cases differ only by the 32 bit, so a pair reacts when `a ^ b == 32`.
     If the optional `kill_symbol` flag is used, any link in the chain using that symbol
     will also be removed.
     
     Arguments:
-        poly {str} -- The polymber to be collapsed
+        poly {bytes} -- The polymer to be collapsed
     
     Keyword Arguments:
-        kill_symbol {Optional[str]} -- A symbol that should be removed, 
+        kill_symbol {Optional[int]} -- A symbol's byte code that should be removed in either case,
                     even if it doesn't have a matching pair (default: {None})
+        stack {Optional[bytearray]} -- An already collapsed polymer to carry on from,
+                    it gets extended in place (default: {None})
     
     Returns:
-        str -- The collapsed polymer
+        bytearray -- The collapsed polymer
     """
 
-    idx = -1
-    _poly = list(poly)
+    if stack is None:
+        stack = bytearray()
+    push = stack.append
+    pop = stack.pop
+    kill = -1 if kill_symbol is None else kill_symbol | 32
+    for c in poly:
+        if c | 32 == kill:
+            continue
+        if stack and stack[-1] == c ^ 32:
+            pop()
+        else:
+            push(c)
+    return stack
+
+
+def collapse_file(path: str, kill_symbol: Optional[int] = None, chunk_size: int = 1 << 20) -> bytearray:
+    """Collapses a polymer file, reading it a chunk at a time.
+    Each chunk is reduced onto the stack left by the chunks before it, so memory is
+    bounded by the collapsed polymer plus one chunk, rather than the whole file.
+    
+    Arguments:
+        path {str} -- The polymer file
+    
+    Keyword Arguments:
+        kill_symbol {Optional[int]} -- A symbol's byte code that should be removed in either case (default: {None})
+        chunk_size {int} -- Bytes to read at a time (default: {1 << 20})
+    
+    Returns:
+        bytearray -- The collapsed polymer
+    """
+
+    stack = bytearray()
+    with open(path, 'rb') as f:
+        for chunk in iter(partial(f.read, chunk_size), b''):
+            # Line breaks aren't units, and XOR 32 would happily pair them with something that is.
+            collapse_polymer(chunk.translate(None, b'\r\n'), kill_symbol, stack)
+    return stack
+
+
+def _removal_length(name: str, size: int, symbol: int) -> Tuple[int, int]:
+    """Worker for `sweep_removals`, collapses the shared polymer without one symbol."""
+    shm = SharedMemory(name=name)
     try:
-        while "Scanning Polymer":
-            c = _poly[idx]
-            if kill_symbol is not None and c.upper() == kill_symbol.upper():
-                _poly.pop(idx)
-                idx += 1
-            elif ((c == c.upper() and _poly[idx-1] == c.lower()) or
-                (c == c.lower() and _poly[idx-1] == c.upper())):
-                _poly.pop(idx)
-                _poly.pop(idx)
-                idx += 1
-            else:
-                idx -= 1
-    except IndexError:
-        pass
-    return ''.join(_poly)
-
-# Need to reuse for part 2
-poly = collapse_polymer(poly)
-print(len(poly))
-print(min(len(collapse_polymer(poly, c)) for c in string.ascii_lowercase))
+        with shm.buf[:size] as view:
+            return symbol, len(collapse_polymer(view, symbol))
+    finally:
+        shm.close()
+
 
+def sweep_removals(poly: bytes, alphabet: bytes = string.ascii_lowercase.encode(),
+                   workers: Optional[int] = None) -> Dict[int, int]:
+    """Collapses the polymer once for each symbol removed, spreading the symbols over a process pool.
+    The polymer is copied once into shared memory, so the workers read it without pickling it for every symbol.
+    Passing it an already collapsed polymer saves each worker a lot of work, and gives the same lengths.
+    
+    Arguments:
+        poly {bytes} -- The polymer
+    
+    Keyword Arguments:
+        alphabet {bytes} -- Lower case byte codes of the symbols to try removing (default: {string.ascii_lowercase})
+        workers {Optional[int]} -- Number of processes (default: {None} one per core)
+    
+    Returns:
+        Dict[int, int] -- The collapsed length for each removed symbol.
+    """
+
+    shm = SharedMemory(create=True, size=max(len(poly), 1))
+    try:
+        shm.buf[:len(poly)] = poly
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = pool.map(_removal_length, [shm.name] * len(alphabet), [len(poly)] * len(alphabet), alphabet)
+            return dict(results)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+if __name__ == '__main__':
+    # Need to reuse for part 2
+    poly = collapse_file('day_05.input')
+    print(len(poly))
+    print(min(sweep_removals(poly).values()))
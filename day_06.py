@@ -92,14 +92,17 @@ Your puzzle answer was 44634.
 """
 
 import time
-from itertools import product
-from collections import defaultdict
-from typing import List, Tuple, Dict, Sequence, cast, Union
+from array import array
+from itertools import chain
+from collections import Counter
+from typing import List, Tuple, Sequence, cast, Union
 with open('day_06.input', 'r') as f:
     data = f.read()
 
 Point = Tuple[int, int]
 Rect = Tuple[int, int, int, int]
+# Marks a cell that is equally close to more than one point.
+TIE = -1
 
 points: Sequence[Point] 
 points = cast(Sequence[Point], [tuple(map(int, l.split(', '))) for l in data.split('\n')])
@@ -108,44 +111,17 @@ x_min, *_, x_max = sorted(p[0] for p in points)
 y_min, *_, y_max = sorted(p[1] for p in points)
 
 
-def manhattan_distance(p: Point, q: Point) -> int:
-    """Returns the Manhattan distance between two points
-    
-    https://en.wiktionary.org/wiki/Manhattan_distance
-
-    Arguments:
-        p {Point} -- Start point
-        q {Point} -- End Point
-    
-    Returns:
-        {int} -- distance.
-    """
-
-    return abs(p[0] - q[0]) + abs(p[1] - q[1])
-
-def get_closest(point: Point, points: Sequence[Point]) -> int:
-    """Calculates the closest point to the given point from a sequence of points.
-    Returns -1 if there is a tie for the closet point.
-    
-    Arguments:
-        point {Point} -- The given point.
-        points {Sequence[Point]} -- The points to check against.
-    
-    Returns:
-        int -- The closest point, or -1 in case of a tie.
-    """
-
-    closest = sorted(((idx, manhattan_distance(point, _point)) for idx, _point in enumerate(points)), key=lambda x: x[1])
-    if closest[0][1] == closest[1][1]:
-        return -1
-    return closest[0][0]
-
 def get_largest_area(rect: Rect, points: Sequence[Point]) -> int:
     """Find the largest bounded area around all the points.
 
     This basically is creating a voronai using the manhattan distance, and throwing out any ties.
     If any of the cells are on the edge of the diagram, we declare their area to be infinite, and 
     so we just ignore those.
+
+    Rather than measuring every cell against every point, we flood fill outwards from all of the points
+    at once, one step of manhattan distance per round. A cell reached by two different points in the
+    same round is a tie, and ties spread just like any other claim.
+    That makes this linear in the size of the diagram, no matter how many points there are.
     
     Arguments:
         rect {Rect} -- The diagram size
@@ -155,22 +131,89 @@ def get_largest_area(rect: Rect, points: Sequence[Point]) -> int:
         int -- The size of the largest bounded cluster.
     """
 
-    area: Dict[int, int] = defaultdict(int)
     x_max, y_max, x_min, y_min = rect
-    for x, y in product(range(x_min, x_max), range(y_min, y_max)):
-        closest = get_closest((x, y), points)
-        if -1 in (closest, area[closest]):
-            continue
-        elif x in (x_min, x_max) or y in (y_min, y_max):
-            area[closest] = -1
+    width = x_max - x_min + 1
+    height = y_max - y_min + 1
+    size = width * height
+    # Each cell stores the index of its closest point, or TIE.
+    # Distances are only needed to tell this round's claims from older ones.
+    owner = array('i', [TIE]) * size
+    distance = array('i', [-1]) * size
+
+    frontier: List[int] = []
+    for idx, (x, y) in enumerate(points):
+        cell = (y - y_min) * width + (x - x_min)
+        if distance[cell] == -1:
+            distance[cell] = 0
+            owner[cell] = idx
+            frontier.append(cell)
         else:
-            area[closest] += 1
-    return max(area.values())
+            owner[cell] = TIE
+
+    step = 0
+    while frontier:
+        step += 1
+        reached: List[int] = []
+        for cell in frontier:
+            claim = owner[cell]
+            x = cell % width
+            for neighbor, valid in ((cell - 1, x > 0), (cell + 1, x < width - 1),
+                                    (cell - width, cell >= width), (cell + width, cell < size - width)):
+                if not valid:
+                    continue
+                seen = distance[neighbor]
+                if seen == -1:
+                    distance[neighbor] = step
+                    owner[neighbor] = claim
+                    reached.append(neighbor)
+                elif seen == step and owner[neighbor] != claim:
+                    owner[neighbor] = TIE
+        frontier = reached
+
+    # Anything that reaches the edge of the diagram keeps on going forever.
+    edges = chain(range(width), range(size - width, size), range(0, size, width), range(width - 1, size, width))
+    infinite = {owner[cell] for cell in edges}
+    area = Counter(owner)
+    return max((count for idx, count in area.items() if idx != TIE and idx not in infinite), default=0)
+
+def get_axis_distances(coords: Sequence[int], lo: int, hi: int) -> List[int]:
+    """Total distance from each position in [lo, hi] to every coordinate, along a single axis.
+
+    Stepping one position to the right moves us one closer to everything on our right, and one
+    further from everything at or behind us, so with the coordinates sorted each position costs
+    a single addition.
+    
+    Arguments:
+        coords {Sequence[int]} -- The coordinates along this axis, all of them must be >= lo.
+        lo {int} -- The first position.
+        hi {int} -- The last position.
+    
+    Returns:
+        List[int] -- The total distance for each position.
+    """
+
+    coords = sorted(coords)
+    count = len(coords)
+    total = sum(c - lo for c in coords)
+    passed = 0
+    distances = []
+    for pos in range(lo, hi + 1):
+        distances.append(total)
+        while passed < count and coords[passed] <= pos:
+            passed += 1
+        total += passed - (count - passed)
+    return distances
 
 def get_safe_area(rect: Rect, points: Sequence[Point], safe_range: int = 10000) -> int:
     """This computes the size of the safe landing zone.
     The safe area is defined by any point that has a total distance to all of hte points less
     than the given `safe_range`
+
+    Manhattan distance splits into an x part and a y part, so the total distance of any cell is
+    just the total distance of its column plus that of its row. We compute both of those once,
+    then count the (column, row) pairs that add up to less than `safe_range` with a two pointer sweep.
+    With a big enough `safe_range` the zone spills out past `rect`, so we pad it by as far as it could possibly reach.
+
     Arguments:
         rect {Rect} -- The size of the diagram.
         points {Sequence[Point]} -- The series of points to check against.
@@ -183,11 +226,20 @@ def get_safe_area(rect: Rect, points: Sequence[Point], safe_range: int = 10000)
     """
 
     x_max, y_max, x_min, y_min = rect
+    # Every step outside the diagram adds at least len(points) to the total.
+    margin = safe_range // len(points) + 1
+    columns = get_axis_distances([p[0] for p in points], x_min - margin, x_max + margin)
+    rows = get_axis_distances([p[1] for p in points], y_min - margin, y_max + margin)
+    columns = sorted(d for d in columns if d < safe_range)
+    rows.sort()
+
     safe = 0
-    for p in product(range(x_min, x_max), range(y_min, y_max)):
-        total_distance = sum(manhattan_distance(p, point) for point in points)
-        if total_distance < safe_range:
-            safe += 1
+    fits = len(rows)
+    for column in columns:
+        # Columns only get further away, so the rows that still fit only ever shrink.
+        while fits and column + rows[fits - 1] >= safe_range:
+            fits -= 1
+        safe += fits
     return safe
 
 
@@ -79,9 +79,9 @@ With 5 workers and the 60+ second step durations described above, how long will
 Your puzzle answer was 971.
 """
 
-from collections import defaultdict
+import heapq
 from string import ascii_uppercase
-from typing import List, Tuple, Dict, Sequence
+from typing import List, Tuple, Sequence
 
 with open('day_07.input', 'r') as f:
     data = f.read()
@@ -95,63 +95,120 @@ with open('day_07.input', 'r') as f:
 # Step F must be finished before step E can begin."""
 
 pairs: List[Tuple[str, str]] = [(line.split()[1], line.split()[7]) for line in data.split('\n')]
-pairs = sorted(pairs, key=lambda x: (sum(x[0] == pair[1] for pair in pairs), x))
 
-def topo_sort_pairs(pairs: Sequence[Tuple[str, str]]) -> str:
+Graph = Tuple[List[str], List[List[int]], List[int]]
+
+
+def build_graph(pairs: Sequence[Tuple[str, str]]) -> Graph:
+    """Numbers the nodes in alphabetical order, so comparing ids is the same as comparing names.
+
+    Arguments:
+        pairs {Sequence[Tuple[str, str]]} -- The graph edges as a pair of nodes.
+
+    Returns:
+        Graph -- (names, successors, degrees), the node names by id, each node's connected nodes,
+                 and the number of incoming connections for each node.
     """
-    Topological sorting of the given pairs, as long as they form a DAG
 
-    First we create the graph, by mapping each vertex to its connected vertices.
-    We also store off the degree value for each vertex, this tracks the number of incoming connections.
+    names = sorted({node for pair in pairs for node in pair})
+    ids = {name: i for i, name in enumerate(names)}
+    successors: List[List[int]] = [[] for _ in names]
+    degrees = [0] * len(names)
+    for u, v in pairs:
+        successors[ids[u]].append(ids[v])
+        degrees[ids[v]] += 1
+    return names, successors, degrees
+
+
+def topo_sort(successors: Sequence[Sequence[int]], degrees: Sequence[int]) -> List[int]:
+    """
+    Topological sorting of the graph, as long as it is a DAG, taking the lowest id first whenever there's a choice.
 
-    We then find all vertices with a 0 degree, and add them to the queue to be processed.
-    Then we remove an item from the queue, and walk to each of its connected vertices, removing 1 degree
+    We find all vertices with a 0 degree, and add them to the queue to be processed.
+    Then we remove the lowest item from the queue, and walk to each of its connected vertices, removing 1 degree
     as we visit the node.
     If the degree drops to 0, we enqueue that vertex.
-    
+    The queue is a heap, so each step costs O(log V).
+
     This is based on https://en.wikipedia.org/wiki/Topological_sorting#Kahn%27s_algorithm
-    
+
     Arguments:
-        pairs {Sequence[Tuple[str, str]]} -- The graph edges as a pair of nodes.
-    
+        successors {Sequence[Sequence[int]]} -- The connected vertices of each vertex.
+        degrees {Sequence[int]} -- The number of incoming connections of each vertex.
+
     Returns:
-        str -- The graph in sorted order.
+        List[int] -- The vertex ids in sorted order.
     """
 
-    graph: Dict[str, list] = defaultdict(list)
-    degrees: Dict[str, int] = defaultdict(int)
+    degrees = list(degrees)
+    queue = [u for u, degree in enumerate(degrees) if not degree]
+    heapq.heapify(queue)
+    processed: List[int] = []
+    while queue:
+        u = heapq.heappop(queue)
+        processed.append(u)
+        for v in successors[u]:
+            degrees[v] -= 1
+            if not degrees[v]:
+                heapq.heappush(queue, v)
+    return processed
 
-    queue: List[str] = []
-    processed: List[str] = []
 
-    for u, v in pairs:
-        graph[u].append(v)
-        degrees[v] += 1
+def schedule(successors: Sequence[Sequence[int]], degrees: Sequence[int], durations: Sequence[int],
+             num_workers: int) -> int:
+    """Works out how long it takes a pool of workers to complete every step,
+    each free worker taking the lowest ready id.
 
-    for u, vs in graph.items():
-        vs.sort()
-        if not degrees[u]:
-            queue.append(u)
+    Both the ready steps and the busy workers are heaps, the workers keyed on when they finish,
+    so each step is started and finished in O(log V).
 
-    # Reverse sort the queue so the first node alphabetically is always at the end.
-    # This way queue.pop() always returns the next node to be processed.
-    queue.sort(reverse=True)
+    Arguments:
+        successors {Sequence[Sequence[int]]} -- The connected vertices of each vertex.
+        degrees {Sequence[int]} -- The number of incoming connections of each vertex.
+        durations {Sequence[int]} -- How long each step takes.
+        num_workers {int} -- Size of the worker pool.
 
-    while queue:
-        u = queue.pop()
-        processed.append(u)
-        for v in graph[u]:
+    Returns:
+        int -- Time it takes to complete the job.
+    """
+
+    degrees = list(degrees)
+    queue = [u for u, degree in enumerate(degrees) if not degree]
+    heapq.heapify(queue)
+    # Each element in the worker pool is a tuple (time_to_finish: int, node: int)
+    workers: List[Tuple[int, int]] = []
+    build_time = 0
+    while queue or workers:
+        while len(workers) < num_workers and queue:
+            u = heapq.heappop(queue)
+            heapq.heappush(workers, (build_time + durations[u], u))
+        build_time, u = heapq.heappop(workers)
+        for v in successors[u]:
             degrees[v] -= 1
             if not degrees[v]:
-                queue.append(v)
-        queue.sort(reverse=True)
-    return ''.join(processed)
+                heapq.heappush(queue, v)
+    return build_time
+
+
+def topo_sort_pairs(pairs: Sequence[Tuple[str, str]]) -> str:
+    """
+    Topological sorting of the given pairs, as long as they form a DAG, alphabetically first whenever there's a choice.
+    
+    Arguments:
+        pairs {Sequence[Tuple[str, str]]} -- The graph edges as a pair of nodes.
+    
+    Returns:
+        str -- The graph in sorted order.
+    """
+
+    names, successors, degrees = build_graph(pairs)
+    return ''.join(names[u] for u in topo_sort(successors, degrees))
 
 
 def calculate_build_time(pairs: Sequence[Tuple[str, str]], num_workers: int = 5, time_penalty: int = 60) -> int:
     """
     Similar to the above tological sort, except this time we are weighting the nodes based on how long it takes to finish the work
-    instead of just their position alphabetically.
+    instead of just their position alphabetically, `time_penalty` plus the position in the alphabet with A being 1.
 
     In addition the number of workers is limited, so we've setup a pool of workers where each node is added along with its completion time.
     Nodes are then removed from the pool starting with the fastest built, and the current build time is updated to reflect this new time.
@@ -168,49 +225,9 @@ def calculate_build_time(pairs: Sequence[Tuple[str, str]], num_workers: int = 5,
         int -- Time it takes to complete the job, in seconds.
     """
 
-    def update_pools(queue: List[str], workers: List[Tuple[int, str]]):
-        # Probably faster to just have this mutate the pools in place, but I don't like functions that do that.
-        queue = queue[:]
-        workers = workers[:]
-        queue.sort(reverse=True)
-        while len(workers) < num_workers and queue:
-            u = queue.pop()
-            w = (build_time + time_penalty + ascii_uppercase.index(u), u)
-            workers.append(w)
-        # Reverse sorting the workers, for similar reasons that we reverse sort the queue.
-        # This will always remove the node with the lowest build time
-        workers.sort(reverse=True)
-        return queue, workers
-
-    build_time = 0
-    time_penalty += 1
-    graph: Dict[str, list] = defaultdict(list)
-    degrees: Dict[str, int] = defaultdict(int)
-
-    queue: List[str] = []
-    workers: List[Tuple[int, str]] = []
-
-    for u, v in pairs:
-        graph[u].append(v)
-        degrees[v] += 1
-
-    for u, vs in graph.items():
-        vs.sort()
-        if not degrees[u]:
-            queue.append(u)
-
-    # Spinning up the worker pool, each element in the worker pool is a tuple (time_to_finish: int, node: str)
-    # We update the build_time each time we remove an element from the worker pool.
-    queue, workers = update_pools(queue, workers)
-    while queue or workers:
-        build_time, u = workers.pop()
-        for v in graph[u]:
-            degrees[v] -= 1
-            if not degrees[v]:
-                queue.append(v)
-    
-        queue, workers = update_pools(queue, workers)
-    return build_time
+    names, successors, degrees = build_graph(pairs)
+    durations = [time_penalty + 1 + ascii_uppercase.index(name) for name in names]
+    return schedule(successors, degrees, durations, num_workers)
 
 
 if __name__ == '__main__':
@@ -60,16 +60,15 @@ Your puzzle answer was 25656.
 """
 
 from collections import defaultdict
-from typing import List, Tuple, Dict
+from typing import List, Sequence, Tuple, Dict
 
-with open('day_08.input', 'r') as f:
-    data = f.read()
+from loaders import load_ints
 
-# data = """2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2"""
-vals: List[int] = list(map(int, data.split()))
+vals: Sequence[int] = load_ints('day_08.input')
+# vals = [2, 3, 0, 3, 10, 11, 12, 1, 1, 0, 1, 99, 2, 1, 1, 2]
 
 
-def build_node(vals: List[int]) -> Tuple[Dict[str, list], List[int]]:
+def build_node(vals: Sequence[int]) -> Tuple[Dict[str, list], List[int]]:
     root: Dict[str, list] = defaultdict(list)
     node_count, metadata_lenght, *vals = vals
     for _ in range(node_count):
@@ -64,9 +64,13 @@ Your puzzle answer was 3273842452.
 Both parts of this puzzle are complete! They provide two gold stars: **
 """
 
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from array import array
 from itertools import cycle
-from typing import List, Tuple, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from collections import deque, defaultdict
 
 # Part 1 and 2 have been placed in the input file, so running once will work.
@@ -80,13 +84,22 @@ with open('day_09.input', 'r') as f:
 # 21 players; last marble is worth 6111 points: high score is 54718
 # 30 players; last marble is worth 5807 points: high score is 37305"""
 
-games: List[Tuple[int, ...]] = [tuple(map(int, re.findall(r'\d+', line))) for line in data.split('\n')]  
+games: List[Tuple[int, ...]] = [tuple(map(int, re.findall(r'\d+', line))) for line in data.split('\n') if line.strip()]  
+
+
+def play_deque(players: int, marbles: int) -> int:
+    """Plays a game by rotating a deque, so the current marble is always at the end.
+    
+    Arguments:
+        players {int} -- Number of players.
+        marbles {int} -- Value of the last marble.
+    
+    Returns:
+        int -- The winning score.
+    """
 
-for game in games:
     # Turns out rotating a deque is way faster than inserting nodes into a list.
     circle: deque = deque()
-    # high_score gets dropped when we use our actual data.
-    players, marbles, *high_score = game
     scores: Dict[int, int] = defaultdict(int)
 
     for marble, player in zip(range(marbles + 1), cycle(range(players))):
@@ -98,9 +111,118 @@ for game in games:
             # Rotate the circle by 2, and then place a new marble
             circle.rotate(2)
             circle.append(marble)
-
-    if high_score:
-        print(max(scores.values()) == high_score[0])
-    else:
-        print(max(scores.values()))
-
+    return max(scores.values(), default=0)
+
+
+def play_linked(players: int, marbles: int) -> int:
+    """Plays a game on a doubly linked circle, stored as two preallocated arrays indexed by marble value.
+    
+    Every marble is placed exactly once, so `clockwise[m]` and `counter_clockwise[m]` can hold the
+    neighbours of marble `m` without ever allocating a node.
+    This takes 8 bytes per marble, which is much less than a deque of Python ints.
+    
+    Arguments:
+        players {int} -- Number of players.
+        marbles {int} -- Value of the last marble.
+    
+    Returns:
+        int -- The winning score.
+    """
+
+    clockwise = array('I', bytes(4 * (marbles + 1)))
+    counter_clockwise = array('I', bytes(4 * (marbles + 1)))
+    scores = array('Q', bytes(8 * players))
+    current = 0
+    for marble in range(1, marbles + 1):
+        if marble % 23:
+            # Place the marble between the ones 1 and 2 clockwise of the current marble.
+            left = clockwise[current]
+            right = clockwise[left]
+            clockwise[left] = marble
+            counter_clockwise[marble] = left
+            clockwise[marble] = right
+            counter_clockwise[right] = marble
+            current = marble
+        else:
+            # Remove the marble 7 counter clockwise, the one after it becomes current.
+            removed = current
+            for _ in range(7):
+                removed = counter_clockwise[removed]
+            left = counter_clockwise[removed]
+            current = clockwise[removed]
+            clockwise[left] = current
+            counter_clockwise[current] = left
+            scores[marble % players] += marble + removed
+    return max(scores)
+
+
+ENGINES: Dict[str, Callable[[int, int], int]] = {
+    'deque': play_deque,
+    'linked': play_linked,
+}
+
+
+def benchmark(players: int, marbles: int) -> Dict[str, float]:
+    """Plays the same game on every engine, making sure they agree.
+    
+    Arguments:
+        players {int} -- Number of players.
+        marbles {int} -- Value of the last marble.
+    
+    Returns:
+        Dict[str, float] -- Seconds taken by each engine.
+    """
+
+    timings: Dict[str, float] = {}
+    scores = set()
+    for name, engine in ENGINES.items():
+        start = time.perf_counter()
+        scores.add(engine(players, marbles))
+        timings[name] = time.perf_counter() - start
+    assert len(scores) == 1, 'Engines disagree on the winning score.'
+    return timings
+
+
+def play_game(game: Tuple[int, ...]) -> Tuple[Tuple[int, ...], int]:
+    """Plays a single parsed game, picking the engine by its size.
+    
+    Arguments:
+        game {Tuple[int, ...]} -- (players, last marble) and optionally the expected high score.
+    
+    Returns:
+        Tuple[Tuple[int, ...], int] -- The game, and its winning score.
+    """
+
+    players, marbles, *_ = game
+    # The deque is plenty quick, but the linked engine keeps really long games in memory.
+    engine = 'linked' if marbles > 10000000 else 'deque'
+    return game, ENGINES[engine](players, marbles)
+
+
+def run_games(games: Iterable[Tuple[int, ...]], workers: Optional[int] = None) -> Iterator[Tuple[Tuple[int, ...], int]]:
+    """Plays every game in its own process, yielding the results as they finish rather than in order.
+    
+    Arguments:
+        games {Iterable[Tuple[int, ...]]} -- Parsed games.
+    
+    Keyword Arguments:
+        workers {Optional[int]} -- Number of processes (default: {None} one per core)
+    
+    Returns:
+        Iterator[Tuple[Tuple[int, ...], int]] -- Each game along with its winning score.
+    """
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(play_game, game) for game in games]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+if __name__ == '__main__':
+    for game, score in run_games(games):
+        # high_score gets dropped when we use our actual data.
+        players, marbles, *high_score = game
+        if high_score:
+            print(f'{players} players, {marbles} marbles: {score == high_score[0]}')
+        else:
+            print(score)
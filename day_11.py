@@ -80,20 +80,25 @@ Your puzzle input was 9306.
 
 """
 
-from collections import defaultdict
-from itertools import product
-from typing import Tuple, Dict
+import json
+import os
+from itertools import accumulate
+from operator import sub
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+# Summed power grid, indexed as grid[x][y].
+SummedGrid = List[List[int]]
+# The top left coordinates of a square, its size and its power level.
+Square = Tuple[Tuple[int, int], int, int]
 
-def get_power_level(x: int, y: int, serial: int = 9306) -> int:
+
+def get_power_level(x: int, y: int, serial: int) -> int:
     """Returns the powerlevel at a given coordinate (x, y) based on the serial number {serial}
     
     Arguments:
         x {int} -- x coordinate
         y {int} -- y coordinate
-    
-    Keyword Arguments:
-        serial {int} -- Serial number (default: {9306})
+        serial {int} -- Serial number
     
     Returns:
         int -- Power level
@@ -108,28 +113,56 @@ def get_power_level(x: int, y: int, serial: int = 9306) -> int:
     return power_level
 
 
-def create_summed_power_grid(size:int = 300) -> Dict[Tuple[int, int], int]:
-    """Creates a grid where each cell (x, y) is equal to the summed power level of all cells within the rect (1, 1, x, y).
+def create_summed_power_grids(serials: Iterable[int], size: int = 300) -> Dict[int, SummedGrid]:
+    """Creates a grid for each serial where each cell (x, y) is equal to the summed power level of all cells within the rect (1, 1, x, y).
+    
+    So Grid[1][1] == get_power_levels(1, 1) and Grid[1][2] == get_power_levels(1, 1) + get_power_levels(1, 2)
+
+    Each grid is a list of columns, with an extra column and row of zeros at index 0 so the edges
+    need no special casing.
+    All the grids are built together, as (rack_id * y + serial) * rack_id is rack_id * rack_id * y + serial * rack_id,
+    and only the second half of that depends on the serial.
+
+    Arguments:
+        serials {Iterable[int]} -- Serial numbers to build grids for.
+
+    Keyword Arguments:
+        size {int} -- Size of the square grids to create. (default: {300})
+    
+    Returns:
+        Dict[int, SummedGrid] -- The grid for each serial.
+    """
+
+    grids: Dict[int, SummedGrid] = {serial: [[0] * (size + 1)] for serial in serials}
+    for x in range(1, size + 1):
+        # Each column is the running total of its own power levels, added on top of the column before it.
+        # Doing a whole column at a time keeps the work in list comprehensions instead of dictionary lookups.
+        rack_id = x + 10
+        shared = [rack_id * rack_id * y for y in range(1, size + 1)]
+        for serial, grid in grids.items():
+            offset = serial * rack_id
+            levels = [(power + offset) // 100 % 10 - 5 for power in shared]
+            grid.append([prev + total for prev, total in zip(grid[-1], accumulate(levels, initial=0))])
+    return grids
+
+
+def create_summed_power_grid(serial: int, size: int = 300) -> SummedGrid:
+    """Creates the summed power grid for a single serial, see `create_summed_power_grids`.
     
-    So Grid[(1, 1)] == get_power_levels(1, 1) and Grid[(1, 2)] == get_power_levels(1, 1) + get_power_levels(1, 2)
+    Arguments:
+        serial {int} -- Serial number
 
     Keyword Arguments:
         size {int} -- Size of the square grid to create. (default: {300})
     
     Returns:
-        Dict[Tuple[int, int], int] -- The grid.
+        SummedGrid -- The grid.
     """
 
-    grid: Dict[Tuple[int, int], int] = defaultdict(int)
-    for x, y in product(range(1, size + 1), range(1, size + 1)):
-        # This is done by taking the new cell (x, y) power level, and adding to the regions represented by (x, y-1) and (y, x-1)
-        # which creates an overlap that we need to subtract out, which would be (x-1, y-1)
-        # This lets us build up all the power levels for a few adds and a subtract, which is much cheaper than summing the whole board.
-        grid[(x, y)] = get_power_level(x, y) + grid[(x-1, y)] + grid[(x, y-1)] - grid[(x-1, y-1)]
-    return grid
+    return create_summed_power_grids([serial], size)[serial]
 
 
-def get_power_area(grid: Dict[Tuple[int, int], int], x: int, y: int, s: int = 3) -> int:
+def get_power_area(grid: SummedGrid, x: int, y: int, s: int = 3) -> int:
     """Returns the power level for a given quad of coordinates (x, y, x+s-1, y+s-1)
     
     We calculate this in a similar manner to how we created the summed power grid.
@@ -151,7 +184,7 @@ def get_power_area(grid: Dict[Tuple[int, int], int], x: int, y: int, s: int = 3)
     7.....####
 
     Arguments:
-        grid {Dict[Tuple[int, int], int]} -- The summed power grid.
+        grid {SummedGrid} -- The summed power grid.
         x {int} -- x coordinate
         y {int} -- y coordinate
     
@@ -165,14 +198,18 @@ def get_power_area(grid: Dict[Tuple[int, int], int], x: int, y: int, s: int = 3)
     # Need to pull these in by 1 to properly offset the rects.
     x -= 1
     y -= 1
-    return grid[(x, y)] + grid[(x+s, y+s)] - grid[(x+s, y)] - grid[(x, y+s)]
+    return grid[x][y] + grid[x+s][y+s] - grid[x+s][y] - grid[x][y+s]
 
 
-def get_max_power_at_size(grid: Dict[Tuple[int, int], int], s: int = 3) -> Tuple[Tuple[int, int], int]:
+def get_max_power_at_size(grid: SummedGrid, s: int = 3) -> Tuple[Tuple[int, int], int]:
     """Returns the coordinates with the highest area at the given size, along with the size of the region.
+
+    This is the same sum as `get_power_area`, but done a whole column of the grid at a time
+    by subtracting slices of the summed columns from each other.
+    Ties go to the last coordinates, scanning x then y.
     
     Arguments:
-        grid {Dict[Tuple[int, int], int]} -- The summed power grid.
+        grid {SummedGrid} -- The summed power grid.
     
     Keyword Arguments:
         s {int} -- The size of the area to calculate the power for (default: {3})
@@ -181,25 +218,130 @@ def get_max_power_at_size(grid: Dict[Tuple[int, int], int], s: int = 3) -> Tuple
         Tuple[Tuple[int, int], int] -- Coordinates and size.
     """
 
-    power_level = 0
+    # Every cell is at least -5, so this is lower than any square can be.
+    power_level = -5 * s * s
     coordinates = (0, 0)
-    for x, y in product(range(1, 301-s), range(1, 301-s)):
-        _power_level = get_power_area(grid, x, y, s)
+    size = len(grid) - 1
+    for x in range(1, size + 2 - s):
+        # The summed power of the strip of columns x to x+s-1, then the difference of that s rows apart.
+        strip = list(map(sub, grid[x - 1 + s], grid[x - 1]))
+        powers = list(map(sub, strip[s:], strip))
+        _power_level = max(powers)
         if _power_level >= power_level:
-            coordinates = (x, y)
+            coordinates = (x, len(powers) - powers[::-1].index(_power_level))
             power_level = _power_level
     return coordinates, power_level
 
+def get_power_bound(bounds: List[int], s: int) -> int:
+    """Returns an upper bound for the power of any square of size s, from the bounds of the smaller sizes.
+
+    A square of size s = a + b splits into an a square, a b square and two a by b rectangles,
+    and each rectangle is (a // b) b squares plus a strip of a % b by b cells, which are at most 4 each.
+
+    Arguments:
+        bounds {List[int]} -- bounds[k] is the highest power any square of size k can have, for every k < s.
+        s {int} -- The size of the square.
+
+    Returns:
+        int -- The highest power a square of size s could have.
+    """
+
+    bound = 4 * s * s
+    for b in range(1, s // 2 + 1):
+        a = s - b
+        rect = (a // b) * bounds[b] + 4 * (a % b) * b
+        bound = min(bound, bounds[a] + bounds[b] + 2 * rect)
+    return bound
+
+
+def get_max_power(grid: SummedGrid) -> Square:
+    """Returns the most powerful square of any size, as its coordinates, size and power.
+    Ties go to the smallest size.
+
+    Sizes that can't beat the best square so far, going by `get_power_bound`, are skipped.
+    Larger squares are mostly negative, so only the smaller sizes end up being searched.
+    
+    Arguments:
+        grid {SummedGrid} -- The summed power grid.
+    
+    Returns:
+        Square -- Coordinates, size and power level.
+    """
+
+    best: Square = ((0, 0), 0, 0)
+    bounds = [0] * len(grid)
+    for s in range(1, len(grid)):
+        bound = get_power_bound(bounds, s)
+        if best[1] and bound <= best[2]:
+            bounds[s] = bound
+            continue
+        coordinates, power_level = get_max_power_at_size(grid, s)
+        bounds[s] = power_level
+        if not best[1] or power_level > best[2]:
+            best = (coordinates, s, power_level)
+    return best
+
+
+# Bump this whenever the search changes, so cached answers from an older search aren't reused.
+CACHE_VERSION = 2
+
+
+def _cache_key(serial: int, size: int) -> str:
+    return 'v{}:{}:{}'.format(CACHE_VERSION, serial, size)
+
+
+def find_best_squares(serials: Iterable[int], size: int = 300, cache_path: Optional[str] = None) -> Dict[int, Square]:
+    """Finds the most powerful square of any size for each serial.
+
+    Given a `cache_path`, answers are stored in a small json file keyed by `CACHE_VERSION`, serial and grid size,
+    so asking about the same serial again doesn't redo the search.
+    
+    Arguments:
+        serials {Iterable[int]} -- Serial numbers to search.
+    
+    Keyword Arguments:
+        size {int} -- Size of the square grids. (default: {300})
+        cache_path {Optional[str]} -- Where to cache results, e.g. 'day_11.cache'. (default: {None} no caching)
+    
+    Returns:
+        Dict[int, Square] -- Coordinates, size and power level of the best square for each serial.
+    """
+
+    cache: Dict[str, Any] = {}
+    if cache_path is not None and os.path.exists(cache_path):
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+
+    serials = list(serials)
+    missing = [serial for serial in serials if _cache_key(serial, size) not in cache]
+    for serial, grid in create_summed_power_grids(missing, size).items():
+        coordinates, s, power_level = get_max_power(grid)
+        cache[_cache_key(serial, size)] = [list(coordinates), s, power_level]
+
+    if missing and cache_path is not None:
+        with open(cache_path, 'w') as f:
+            json.dump(cache, f)
+
+    results: Dict[int, Square] = {}
+    for serial in serials:
+        (x, y), s, power_level = cache[_cache_key(serial, size)]
+        results[serial] = ((x, y), s, power_level)
+    return results
+
+
+# Puzzle input
+SERIAL = 9306
+
 assert get_power_level(3, 5, 8) == 4
 assert get_power_level(122, 79,  57) == - 5
 assert get_power_level(217, 196,  39) ==  0
 assert get_power_level(101, 153,  71) ==  4
 
-s_grid = create_summed_power_grid(300)
+s_grid = create_summed_power_grid(SERIAL)
 
 # Part 01
 print(get_max_power_at_size(s_grid, 3)[0])
 
 # Part 02
-((coord, power), size) = max(((get_max_power_at_size(s_grid, s), s) for s in range(1, 301)), key=lambda x: x[0][1])
+coord, size, _ = find_best_squares([SERIAL])[SERIAL]
 print((coord, size))
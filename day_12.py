@@ -69,38 +69,85 @@ After 20 generations, what is the sum of the numbers of all pots which contain a
 
 """
 
-from typing import List, Dict
+from typing import List, Dict, Tuple
+
+from cycles import find_cycle
 
 with open('day_12.input', 'r') as f:
     data: List[str] = f.read().split('\n')
 
 inital_state = data[0][len('initial state: '):]
-# Using a dictionary so that I can have negative indicies.
-pots: Dict[int, str] = {idx: inital_state[idx] if 0 <= idx < len(inital_state) else '.' for idx in range(-3, len(inital_state))}
 
 growth_patterns: Dict[str, str] = {}
 for line in data[2:]:
     pattern, _, v = line.partition(' => ')
     growth_patterns[pattern] = v
 
-delta = 0
-score = sum(i for i in pots if pots[i] == '#')
-# So 50000000000 is way to big to check the whole output.
-# But visual inspection shows that eventually the plants reach an stable state
-# and just slowly drift to the right. This means we can calculate the first few hundred
-# acquire the delta, and then manually compute the rest.
-for count in range(1, 500):
-    new_state: Dict[int, str] = {}
-    # We want to account for expansion as we check our pots.
-    for pot_idx in range(min(pots), max(pots)+2):
-        pattern = ''.join(pots.get(idx, '.') for idx in range(pot_idx-2, pot_idx+3))
-        new_state[pot_idx] = growth_patterns.get(pattern, '.')
-    # Update the pots with the newer state, and update the score and delta values.
-    pots.update(new_state)
-    delta = sum(i for i in pots if pots[i] == '#') - score
-    score += delta
-    if count == 20: # Part 1 Solution
-        print(score)
+# Rather than tracking every pot, we track the stretch from the first plant to the last
+# along with the number of the first pot in it.
+Plants = Tuple[str, int]
+
+
+def advance(plants: str) -> Plants:
+    """Grows the plants by a generation.
+
+    Arguments:
+        plants {str} -- Pots from the first plant to the last.
+
+    Returns:
+        Plants -- The new stretch of plants, and how far its first pot has moved.
+    """
+
+    # Pad with enough empty pots that growth past either end is picked up.
+    padded = '....' + plants + '....'
+    grown = ''.join(growth_patterns.get(padded[idx - 2:idx + 3], '.') for idx in range(2, len(padded) - 2))
+    first = grown.find('#')
+    if first == -1:
+        return '', 0
+    return grown.strip('.'), first - 2
+
+def grow(plants: str, offset: int, generations: int) -> Plants:
+    for _ in range(generations):
+        plants, shift = advance(plants)
+        offset += shift
+    return plants, offset
+
+def pot_sum(plants: str, offset: int) -> int:
+    return sum(offset + idx for idx, pot in enumerate(plants) if pot == '#')
+
+def plants_after(plants: str, offset: int, generations: int) -> Plants:
+    """Works out the plants after any number of generations.
+
+    Eventually the plants settle into a loop, where the same pattern comes back around,
+    just shifted along by some number of pots.
+    So we only need to grow them up to the loop, and measure how far one trip around it moves them.
+
+    Arguments:
+        plants {str} -- Pots from the first plant to the last.
+        offset {int} -- Number of the first pot.
+        generations {int} -- How many generations to grow.
+
+    Returns:
+        Plants -- The plants and the number of their first pot.
+    """
+
+    mu, lam, _ = find_cycle(lambda p: advance(p)[0], plants)
+    if generations <= mu + lam:
+        return grow(plants, offset, generations)
+    plants, offset = grow(plants, offset, mu)
+    _, looped_offset = grow(plants, offset, lam)
+    loops, remaining = divmod(generations - mu, lam)
+    return grow(plants, offset + loops * (looped_offset - offset), remaining)
+
+
+start = inital_state.find('#')
+plants = inital_state.strip('.')
+
+# Part 1 Solution
+print(pot_sum(*plants_after(plants, start, 20)))
 
 # Part 2 Solution
-print(score + (50000000000-500) * delta)
+# So 50000000000 is way to big to check the whole output.
+# But visual inspection shows that eventually the plants reach an stable state
+# and just slowly drift to the right, so once the pattern repeats we can skip ahead.
+print(pot_sum(*plants_after(plants, start, 50000000000)))
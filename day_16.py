@@ -80,108 +80,10 @@ Your puzzle answer was 584.
 """
 
 import re
-from collections import defaultdict
-from typing import Dict, Callable, Set, List, Tuple, Sequence, Iterator
-
-def addr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] + result[b]
-    return result
-
-def addi(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] + b
-    return result
-
-def mulr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] * result[b]
-    return result
-
-def muli(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] * b
-    return result
-
-def banr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] & result[b]
-    return result
-
-def bani(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] & b
-    return result
-
-def borr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] | result[b]
-    return result
-
-def bori(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] | b
-    return result
-
-def setr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a]
-    return result
-
-def seti(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = a
-    return result
-
-def gtir(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = bool(a > result[b])
-    return result
-
-def gtri(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = bool(result[a] > b)
-    return result
-
-def gtrr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = bool(result[a] > result[b])
-    return result
-
-def eqir(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = bool(a == result[b])
-    return result
-
-def eqri(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = bool(result[a] == b)
-    return result
-
-def eqrr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = bool(result[a] == result[b])
-    return result
-
-
-OPERATIONS = [
-    addr, 
-    addi,
-    mulr, 
-    muli,
-    banr, 
-    bani,
-    borr, 
-    bori,
-    setr, 
-    seti,
-    gtir, 
-    gtri, 
-    gtrr,
-    eqir, 
-    eqri, 
-    eqrr
-]
+from typing import Dict, List, Tuple, Sequence, Iterator
+
+from elfcode import OPERATIONS, Operation
+
 # Input was broken into two parts, first part describes the opcode tests.
 # So all the Before / After text.
 # Second part is what is needed for part 2, and those are the operations to run
@@ -207,42 +109,119 @@ def iter_tests(data: List[str]) -> Iterator[Tuple[str, ...]]:
     return zip(*(iter(data),) * 4)
 
 def process_test(*test_data):
-    _before, _data, _after, _ = test
+    _before, _data, _after, _ = test_data
     before = tuple(map(int, re.findall(r'\d+', _before)))
     op_data = tuple(map(int, re.findall(r'\d+', _data)))
     after = list(map(int, re.findall(r'\d+', _after)))
     return before, op_data, after
 
-opcodes: Dict[Callable, Set[int]] = defaultdict(set)
+def match_mask(before: Sequence[int], op_data: Sequence[int], after: Sequence[int]) -> int:
+    """
+    Works out which operations could have produced the sample, as a 16 bit mask
+    where bit `i` is set if `OPERATIONS[i]` matches.
+
+    Every operation only writes register C, so rather than running all 16 operations on copies
+    of the registers we check the other registers once, and then compare each result against after[C].
+    
+    Arguments:
+        before {Sequence[int]} -- Registers before the instruction.
+        op_data {Sequence[int]} -- The instruction, opcode, A, B and C.
+        after {Sequence[int]} -- Registers after the instruction.
+    
+    Returns:
+        int -- The mask of matching operations.
+    """
+
+    _, a, b, c = op_data
+    if any(x != y for idx, (x, y) in enumerate(zip(before, after)) if idx != c):
+        return 0
+    size = len(before)
+    ra = before[a] if a < size else None
+    rb = before[b] if b < size else None
+    results = [
+        None if ra is None or rb is None else ra + rb,
+        None if ra is None else ra + b,
+        None if ra is None or rb is None else ra * rb,
+        None if ra is None else ra * b,
+        None if ra is None or rb is None else ra & rb,
+        None if ra is None else ra & b,
+        None if ra is None or rb is None else ra | rb,
+        None if ra is None else ra | b,
+        ra,
+        a,
+        None if rb is None else int(a > rb),
+        None if ra is None else int(ra > b),
+        None if ra is None or rb is None else int(ra > rb),
+        None if rb is None else int(a == rb),
+        None if ra is None else int(ra == b),
+        None if ra is None or rb is None else int(ra == rb),
+    ]
+    target = after[c]
+    mask = 0
+    for idx, result in enumerate(results):
+        if result == target:
+            mask |= 1 << idx
+    return mask
+
+def resolve_opcodes(candidates: Sequence[int]) -> Dict[int, int]:
+    """
+    Resolves the candidate masks into a one to one mapping of opcode number to operation index.
+
+    Any opcode left with a single candidate claims that operation, which is then cleared from
+    every other mask. If that stalls, we look for an operation that only one opcode can still be.
+    
+    Arguments:
+        candidates {Sequence[int]} -- Candidate operation mask for each opcode number.
+    
+    Raises:
+        ValueError -- If the samples don't pin down every opcode.
+    
+    Returns:
+        Dict[int, int] -- Operation index for each opcode number.
+    """
+
+    masks = list(candidates)
+    resolved: Dict[int, int] = {}
+    taken = 0
+    while len(resolved) < len(masks):
+        progress = False
+        for code, mask in enumerate(masks):
+            if code in resolved:
+                continue
+            mask &= ~taken
+            masks[code] = mask
+            # A mask with exactly one bit set.
+            if mask and not mask & (mask - 1):
+                resolved[code] = mask.bit_length() - 1
+                taken |= mask
+                progress = True
+        if progress:
+            continue
+        for bit in range(len(OPERATIONS)):
+            op_bit = 1 << bit
+            if taken & op_bit:
+                continue
+            owners = [code for code, mask in enumerate(masks) if code not in resolved and mask & op_bit]
+            if len(owners) == 1:
+                masks[owners[0]] = op_bit
+                progress = True
+        if not progress:
+            raise ValueError('Samples are ambiguous, could not resolve every opcode.')
+    return resolved
+
+# Each opcode number starts out able to be any operation, and every sample narrows that down.
+candidates = [(1 << len(OPERATIONS)) - 1] * len(OPERATIONS)
 op_count = 0
 for test in iter_tests(data):
     before, op_data, after = process_test(*test)
-    opcode, a, b, c = op_data
-    count = 0
-    for op in OPERATIONS:
-        if op(before, a, b, c) == after:
-            opcodes[op].add(opcode)
-            count += 1
-    if count >= 3:
-        op_count +=1
+    mask = match_mask(before, op_data, after)
+    candidates[op_data[0]] &= mask
+    if bin(mask).count('1') >= 3:
+        op_count += 1
 # Part 1
 print(op_count)
 
-# Mapping each opcode number to a function.
-# Each function maps to exactly 1 opcode number, and luckily
-# if you inspect the data at this point, one of those functions maps to just one code
-# so we'll find the function that maps to the least number of codes, then remove that code from
-# all the other functions, as we keep processing them like this, we should get a clean 1-1 mapping.
-# A more complex overlap would probably call for doing something fancy with set intersections, and
-# it is posslbe that other inputs lead to that problem.
-code_to_func: Dict[int, Callable] = {}
-while any(codes for codes in opcodes.values()):
-    op = min(opcodes, key=lambda x: len(opcodes[x]))
-    codes = opcodes.pop(op)
-    code = codes.pop()
-    code_to_func[code] = op
-    for val in opcodes.values():
-        val.discard(code)
+code_to_func: Dict[int, Operation] = {code: OPERATIONS[idx] for code, idx in resolve_opcodes(candidates).items()}
 
 # This should ensure that we've actually mapped every opcode to a function.
 assert len(code_to_func) == 16
@@ -254,7 +233,7 @@ operations: List[List[int]] = [list(map(int, line.split(' '))) for line in data]
 
 registers = [0, 0, 0, 0]
 for opc, a, b, c in operations:
-    registers = code_to_func[opc](registers, a, b, c)
+    code_to_func[opc](registers, a, b, c)
 
 # Part 2
 print(registers[0])
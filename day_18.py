@@ -3,6 +3,8 @@ from itertools import chain, product
 from typing import Dict, Tuple, List
 from collections import defaultdict
 
+from cycles import iterate, nth_state
+
 data = """
 .#.#...|#.
 .....#|##|
@@ -26,9 +28,8 @@ def print_forest():
     c = '\n'.join(''.join(forest[(x, y)] for x in range(len(data[0]))) for y in range(len(data)))
     print(c)
 
-def lumber_count():
-    c = '\n'.join(''.join(forest[(x, y)] for x in range(len(data[0]))) for y in range(len(data)))
-    return c.count('#') * c.count('|')
+def lumber_count(state: str) -> int:
+    return state.count('#') * state.count('|')
 
 forest: Dict[Tuple[int, int], str] = {}
 forest_graph:Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list)
@@ -53,34 +54,22 @@ def convert_area(x, y):
         return '.'
     return spot
 
-# Tracking number of steps, and how large of a loop we're looking for.
-# Each time we roll through the loop we check to see if we've seen the value before.
-# If we haven't found a loop, we increase its size.
-steps = 1000000000
-current_step = 1
-loop_size = 1
-loop_remaining = loop_size
-loop_val = forest.copy()
-while current_step <= steps:
-    current_step += 1
-    new_forest = {}
-    for x, y in product(range(len(data[0])), range(len(data))):
-        new_forest[(x,y)] = convert_area(x, y)
-    loop_remaining -= 1
-    if not loop_remaining:
-        if new_forest == loop_val:
-            # Once we've found a loop, we can just math our out of the problem.
-            # True divide the remaining steps by our loop size, then multiply that by the loop_size again
-            # Add that to the current steps, and then we can just iterate the remaining
-            current_step += ((steps - current_step) // loop_size) * loop_size
-        else:
-            loop_size += 1
-            loop_val = new_forest
-            loop_remaining = loop_size
-    forest.update(new_forest)
-    if current_step == 11:
-        # Part 01
-        print(lumber_count())
+def grow(state: str) -> str:
+    """Runs a single minute of growth.
+    The forest is passed around flattened into a string, one row after another,
+    so that states are cheap to compare when looking for a loop.
+    """
+    forest.update(zip(coordinates, state))
+    return ''.join(convert_area(x, y) for x, y in coordinates)
+
+
+coordinates = [(x, y) for y in range(len(data)) for x in range(len(data[0]))]
+initial = ''.join(forest[p] for p in coordinates)
+
+# Part 01
+print(lumber_count(iterate(grow, initial, 10)))
 
 # Part 02
-print(lumber_count())
+# The forest settles into a loop long before a billion minutes, so we find the loop
+# and only simulate whatever is left over after going around it as many times as we can.
+print(lumber_count(nth_state(grow, initial, 1000000000)))
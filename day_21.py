@@ -1,144 +1,92 @@
-from typing import Sequence, List, Set
-
-def addr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] + result[b]
-    return result
-
-def addi(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] + b
-    return result
-
-def mulr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] * result[b]
-    return result
-
-def muli(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] * b
-    return result
-
-def banr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] & result[b]
-    return result
-
-def bani(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] & b
-    return result
-
-def borr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] | result[b]
-    return result
-
-def bori(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a] | b
-    return result
-
-def setr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = result[a]
-    return result
-
-def seti(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = a
-    return result
-
-def gtir(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = int(a > result[b])
-    return result
-
-def gtri(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = int(result[a] > b)
-    return result
-
-def gtrr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = int(result[a] > result[b])
-    return result
-
-def eqir(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = int(a == result[b])
-    return result
-
-def eqri(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = int(result[a] == b)
-    return result
-
-def eqrr(regs: Sequence[int], a: int, b: int, c: int) -> List[int]:
-    result = list(regs)
-    result[c] = int(result[a] == result[b])
-    return result
+from functools import partial
+from typing import Optional
+
+from cycles import last_before_repeat
+from elfcode import Program, TraceBuffer, compile_program, find_shortcuts, parse_program, run
 
 
 with open('day_21.input', 'r') as f:
     data = f.read().split('\n')
 
-instruction_ptr_register = int(data[0].split()[-1])
-instructions = []
-for line in data[1:]:
-    action = line
-    func, a, b, c = map(eval, action.split())
-    instructions.append((func, a, b, c))
+program = parse_program(data)
 
-def process(i):
+def process(i, trace: Optional[TraceBuffer] = None):
     registers = [0] * 6
     registers[0] = i
-    instruction_ptr = 0
-    breaks: Set[int] = set()
-    try:
-        with open('tmp', 'w') as f:
-            while True:
-                instruction_ptr = registers[instruction_ptr_register]
-                f.write(str((instruction_ptr, instructions[instruction_ptr], registers)))
-                f.write('\n')
-                # So we know that instruction 29 is special, as its the only one that interacts with register 0
-                # and register zero is the only one we can manipulate.
-                if instruction_ptr == 28:
-                    print(registers[2])
-                    break
-                breaks.add(tuple(registers))
-                func, a, b, c = instructions[instruction_ptr]
-                registers = func(registers, a, b, c)
-                registers[instruction_ptr_register] += 1
-    except IndexError:
+    # So we know that instruction 29 is special, as its the only one that interacts with register 0
+    # and register zero is the only one we can manipulate.
+    if trace is None:
+        compile_program(program, breakpoints=(28,))(registers)
+    else:
+        # Tracing needs the interpreter, dump the buffer afterwards and use read_trace to inspect it.
+        run(program, registers, breakpoint=28, trace=trace)
+    if registers[program.ip_register] == 28:
+        print(registers[2])
+    else:
         print(registers)
 # Part 1
 process(0)
+# To see how it got there, keep the last 100k instructions around:
+# trace = TraceBuffer(100000)
+# process(0, trace)
+# trace.dump('day_21.trace')
+# Or for a summary of where the time goes, and which instructions touch register 0.
+# Register 0 never makes it halt, so cap the steps, a breakpoint at 28 would stop before 28 ever ran:
+# from elfcode import profile
+# report = profile(program, [0] * 6, steps=100000, detailed=True)
+# print(report.report(), report.touching(0))  # touching(0) is [28]
 
 # Part 2
 
+def next_halting_value(c: int, n: int) -> int:
+    """One pass of the activation system's outer loop, from one value it checks register 0 against to the next."""
+    a = c | 65536
+    c = n
+    while True:
+        c = (((c + (a & 255)) & 16777215) * 65899) & 16777215
+        if 256 > a:
+            return c
+        a //= 256
+
+
 def run_activation_system(n):
-    seen = set()
-    c = 0
-    last_unique_c = -1
+    # The halting values eventually loop, we want the last one before they do.
+    step = partial(next_halting_value, n=n)
+    return last_before_repeat(step, step(0))
+
+
+def find_last_halting_value(program: Program) -> int:
+    """Runs the actual program, stepping through the values it compares against register 0 at instruction 28.
+
+    The values eventually loop, so the last new value before the first repeat is the one
+    that takes the longest to halt on.
+    This is the same search as `run_activation_system`, without having to reverse engineer the program first.
+    
+    Arguments:
+        program {Program} -- The activation system program.
+    
+    Returns:
+        int -- The last unique halting value.
+    """
+
+    shortcuts = find_shortcuts(program, [0] * 6)
+
+    def next_value(value: int) -> int:
+        # Everything else is overwritten before it's read again, so the compared value alone
+        # is enough to resume the program from the breakpoint.
+        registers = [0] * 6
+        registers[program.a[28]] = value
+        registers[program.ip_register] = 28
+        run(program, registers, breakpoint=28, shortcuts=shortcuts)
+        return registers[program.a[28]]
 
-    while True:
-        a = c | 65536 
-        c = n 
-        while True:
-            c = (((c + (a & 255)) & 16777215) * 65899) & 16777215
-            if 256 > a:
-                if c not in seen:
-                    seen.add(c)
-                    last_unique_c = c
-                    break
-                else:
-                    return last_unique_c
-            else:
-                a //= 256
-
-
-n = instructions[7][1] # The loop input, pulled from the 8th instruction.
+    registers = [0] * 6
+    run(program, registers, breakpoint=28, shortcuts=shortcuts)
+    return last_before_repeat(next_value, registers[program.a[28]])
+
+
+n = program.a[7] # The loop input, pulled from the 8th instruction.
 print(n)
-print(run_activation_system(n))
\ No newline at end of file
+print(run_activation_system(n))
+# Same answer straight from the input, quick now that the division loop gets summarized.
+print(find_last_halting_value(program))
\ No newline at end of file
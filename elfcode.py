@@ -0,0 +1,870 @@
+"""Shared register machine for the wrist device.
+
+Days 16, 19 and 21 all run programs made out of the same sixteen opcodes.
+Rather than keeping three copies of the opcode functions around, they live here,
+along with a parser that turns the puzzle input into a compact `Program`, and a
+`run` loop that executes it on a register list that is updated in place.
+"""
+
+import mmap
+import struct
+from array import array
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, MutableSequence, NamedTuple, Optional, Set, Tuple
+
+Registers = MutableSequence[int]
+Operation = Callable[[Registers, int, int, int], None]
+# Replaces a whole loop, updates the registers and returns the instruction pointer the loop exits to.
+Shortcut = Callable[[Registers], int]
+
+
+def addr(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] + regs[b]
+
+def addi(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] + b
+
+def mulr(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] * regs[b]
+
+def muli(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] * b
+
+def banr(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] & regs[b]
+
+def bani(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] & b
+
+def borr(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] | regs[b]
+
+def bori(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a] | b
+
+def setr(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = regs[a]
+
+def seti(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = a
+
+def gtir(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = int(a > regs[b])
+
+def gtri(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = int(regs[a] > b)
+
+def gtrr(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = int(regs[a] > regs[b])
+
+def eqir(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = int(a == regs[b])
+
+def eqri(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = int(regs[a] == b)
+
+def eqrr(regs: Registers, a: int, b: int, c: int) -> None:
+    regs[c] = int(regs[a] == regs[b])
+
+
+# The index of each function in this list is the opcode number used by `Program`.
+OPERATIONS: List[Operation] = [
+    addr,
+    addi,
+    mulr,
+    muli,
+    banr,
+    bani,
+    borr,
+    bori,
+    setr,
+    seti,
+    gtir,
+    gtri,
+    gtrr,
+    eqir,
+    eqri,
+    eqrr,
+]
+OPCODES: Dict[str, int] = {op.__name__: idx for idx, op in enumerate(OPERATIONS)}
+
+
+class Program(NamedTuple):
+    """A parsed program.
+
+    Instructions are stored column-wise, `ops[i]` is the opcode number of instruction `i`
+    and `a[i]`, `b[i]`, `c[i]` are its operands.
+    """
+    ip_register: int
+    ops: array
+    a: array
+    b: array
+    c: array
+
+
+def parse_program(lines: Iterable[str]) -> Program:
+    """Parses the `#ip` declaration and the instructions of a program.
+
+    Blank lines are skipped, so the raw `f.read().split('\\n')` output can be passed straight in.
+
+    Arguments:
+        lines {Iterable[str]} -- The program source, one instruction per line.
+
+    Raises:
+        ValueError -- If the program never binds the instruction pointer.
+
+    Returns:
+        Program -- The parsed program.
+    """
+
+    ip_register = -1
+    ops = array('B')
+    args_a = array('q')
+    args_b = array('q')
+    args_c = array('q')
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#ip'):
+            ip_register = int(line.split()[-1])
+            continue
+        name, a, b, c = line.split()
+        ops.append(OPCODES[name])
+        args_a.append(int(a))
+        args_b.append(int(b))
+        args_c.append(int(c))
+    if ip_register < 0:
+        raise ValueError('Program does not declare an #ip register.')
+    return Program(ip_register, ops, args_a, args_b, args_c)
+
+
+def run(program: Program, registers: Registers, breakpoint: Optional[int] = None,
+        shortcuts: Optional[Dict[int, Shortcut]] = None, trace: Optional['TraceBuffer'] = None) -> int:
+    """Executes the program, updating `registers` in place.
+
+    Execution stops when the instruction pointer leaves the program, or when it jumps to
+    `breakpoint`, in which case that instruction has not been executed yet.
+    Either way the bound register is left holding the final instruction pointer,
+    so calling `run` again resumes from the breakpoint.
+
+    Whenever the instruction pointer lands on an entry in `shortcuts`, that function is called
+    instead of interpreting the loop starting there, see `find_shortcuts`.
+
+    Passing a `trace` records every instruction into it, at the cost of a slower loop.
+
+    Arguments:
+        program {Program} -- The program to execute.
+        registers {Registers} -- The registers, these are modified in place.
+
+    Keyword Arguments:
+        breakpoint {Optional[int]} -- Instruction pointer to stop at (default: {None})
+        shortcuts {Optional[Dict[int, Shortcut]]} -- Loop replacements keyed by loop head (default: {None})
+        trace {Optional[TraceBuffer]} -- Records the executed instructions (default: {None})
+
+    Returns:
+        int -- The number of instructions executed, a shortcut counts as one.
+    """
+
+    if trace is not None:
+        return _run_traced(program, registers, breakpoint, shortcuts or {}, trace)
+
+    ip_register = program.ip_register
+    ops, args_a, args_b, args_c = program.ops, program.a, program.b, program.c
+    size = len(ops)
+    if breakpoint is None:
+        breakpoint = -1
+    if shortcuts is None:
+        shortcuts = {}
+    regs = registers
+    steps = 0
+    ip = regs[ip_register]
+    while 0 <= ip < size:
+        if ip in shortcuts:
+            ip = shortcuts[ip](regs)
+            regs[ip_register] = ip
+            steps += 1
+            if ip == breakpoint:
+                break
+            continue
+        op = ops[ip]
+        a = args_a[ip]
+        b = args_b[ip]
+        c = args_c[ip]
+        # Splitting the dispatch in half keeps it to a handful of comparisons per instruction.
+        if op < 8:
+            if op == 0:
+                regs[c] = regs[a] + regs[b]
+            elif op == 1:
+                regs[c] = regs[a] + b
+            elif op == 2:
+                regs[c] = regs[a] * regs[b]
+            elif op == 3:
+                regs[c] = regs[a] * b
+            elif op == 4:
+                regs[c] = regs[a] & regs[b]
+            elif op == 5:
+                regs[c] = regs[a] & b
+            elif op == 6:
+                regs[c] = regs[a] | regs[b]
+            else:
+                regs[c] = regs[a] | b
+        elif op == 8:
+            regs[c] = regs[a]
+        elif op == 9:
+            regs[c] = a
+        elif op == 10:
+            regs[c] = 1 if a > regs[b] else 0
+        elif op == 11:
+            regs[c] = 1 if regs[a] > b else 0
+        elif op == 12:
+            regs[c] = 1 if regs[a] > regs[b] else 0
+        elif op == 13:
+            regs[c] = 1 if a == regs[b] else 0
+        elif op == 14:
+            regs[c] = 1 if regs[a] == b else 0
+        else:
+            regs[c] = 1 if regs[a] == regs[b] else 0
+        ip = regs[ip_register] + 1
+        regs[ip_register] = ip
+        steps += 1
+        if ip == breakpoint:
+            break
+    return steps
+
+
+# Written in place of the opcode when a shortcut ran instead of an instruction.
+SHORTCUT_OPCODE = -1
+
+_TRACE_MAGIC = b'ELFT'
+# magic, number of registers, number of records that follow
+_TRACE_HEADER = struct.Struct('<4sIQ')
+
+
+class TraceRecord(NamedTuple):
+    ip: int
+    opcode: int
+    registers: Tuple[int, ...]
+
+
+class TraceBuffer:
+    """A fixed size ring buffer holding the most recent instructions of a run.
+
+    Each record is packed as (ip, opcode, *registers) signed 64 bit ints into a single
+    preallocated bytearray, so recording never allocates and old records are simply overwritten.
+    Registers are captured before the instruction executes.
+    """
+
+    def __init__(self, capacity: int, num_registers: int = 6):
+        self.capacity = capacity
+        self.num_registers = num_registers
+        self.record_struct = struct.Struct('<{}q'.format(num_registers + 2))
+        self.data = bytearray(self.record_struct.size * capacity)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def record(self, ip: int, opcode: int, registers: Registers) -> None:
+        offset = (self.count % self.capacity) * self.record_struct.size
+        self.record_struct.pack_into(self.data, offset, ip, opcode, *registers)
+        self.count += 1
+
+    def _ordered(self) -> Iterator[memoryview]:
+        # The oldest surviving record sits just after the newest one once the buffer has wrapped.
+        view = memoryview(self.data)
+        if self.count <= self.capacity:
+            yield view[:self.count * self.record_struct.size]
+        else:
+            split = (self.count % self.capacity) * self.record_struct.size
+            yield view[split:]
+            yield view[:split]
+
+    def __iter__(self) -> Iterator[TraceRecord]:
+        for chunk in self._ordered():
+            for ip, opcode, *registers in self.record_struct.iter_unpack(chunk):
+                yield TraceRecord(ip, opcode, tuple(registers))
+
+    def dump(self, path: str) -> None:
+        """Writes the recorded instructions, oldest first, to a binary file through an mmap.
+
+        Arguments:
+            path {str} -- The file to write, see `read_trace`.
+        """
+
+        size = _TRACE_HEADER.size + len(self) * self.record_struct.size
+        with open(path, 'w+b') as f:
+            f.truncate(size)
+            with mmap.mmap(f.fileno(), size) as mm:
+                _TRACE_HEADER.pack_into(mm, 0, _TRACE_MAGIC, self.num_registers, len(self))
+                offset = _TRACE_HEADER.size
+                for chunk in self._ordered():
+                    mm[offset:offset + len(chunk)] = chunk
+                    offset += len(chunk)
+
+
+def read_trace(path: str) -> Iterator[TraceRecord]:
+    """Lazily reads a trace written by `TraceBuffer.dump`, without loading the whole file.
+
+    Arguments:
+        path {str} -- The dumped trace.
+
+    Raises:
+        ValueError -- If the file isn't a trace.
+
+    Returns:
+        Iterator[TraceRecord] -- The records, oldest first.
+    """
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, num_registers, count = _TRACE_HEADER.unpack_from(mm, 0)
+        if magic != _TRACE_MAGIC:
+            raise ValueError('{} is not an elfcode trace.'.format(path))
+        record_struct = struct.Struct('<{}q'.format(num_registers + 2))
+        for idx in range(count):
+            offset = _TRACE_HEADER.size + idx * record_struct.size
+            ip, opcode, *registers = record_struct.unpack_from(mm, offset)
+            yield TraceRecord(ip, opcode, tuple(registers))
+
+
+def _run_traced(program: Program, registers: Registers, breakpoint: Optional[int],
+                shortcuts: Dict[int, Shortcut], trace: TraceBuffer) -> int:
+    # Same semantics as `run`, kept separate so the untraced loop doesn't pay for recording.
+    ip_register = program.ip_register
+    size = len(program.ops)
+    record = trace.record
+    regs = registers
+    steps = 0
+    ip = regs[ip_register]
+    while 0 <= ip < size:
+        if ip in shortcuts:
+            record(ip, SHORTCUT_OPCODE, regs)
+            ip = shortcuts[ip](regs)
+        else:
+            op = program.ops[ip]
+            record(ip, op, regs)
+            OPERATIONS[op](regs, program.a[ip], program.b[ip], program.c[ip])
+            ip = regs[ip_register] + 1
+        regs[ip_register] = ip
+        steps += 1
+        if ip == breakpoint:
+            break
+    return steps
+
+
+# Expression templates used when translating a program to Python.
+# Each entry is (template, kind of A, kind of B) where a kind is 'r' for a register,
+# 'i' for an immediate value, or '' if the operand is ignored.
+_TEMPLATES: List[Tuple[str, str, str]] = [
+    ('{a} + {b}', 'r', 'r'),
+    ('{a} + {b}', 'r', 'i'),
+    ('{a} * {b}', 'r', 'r'),
+    ('{a} * {b}', 'r', 'i'),
+    ('{a} & {b}', 'r', 'r'),
+    ('{a} & {b}', 'r', 'i'),
+    ('{a} | {b}', 'r', 'r'),
+    ('{a} | {b}', 'r', 'i'),
+    ('{a}', 'r', ''),
+    ('{a}', 'i', ''),
+    ('1 if {a} > {b} else 0', 'i', 'r'),
+    ('1 if {a} > {b} else 0', 'r', 'i'),
+    ('1 if {a} > {b} else 0', 'r', 'r'),
+    ('1 if {a} == {b} else 0', 'i', 'r'),
+    ('1 if {a} == {b} else 0', 'r', 'i'),
+    ('1 if {a} == {b} else 0', 'r', 'r'),
+]
+
+# Longest run of instructions emitted as a single block, this keeps the generated source
+# from growing quadratically on long programs without any jumps.
+_MAX_BLOCK = 64
+
+_compiled: Dict[Tuple, Callable[[Registers], None]] = {}
+
+
+def _register_count(program: Program) -> int:
+    count = program.ip_register + 1
+    for op, a, b, c in zip(program.ops, program.a, program.b, program.c):
+        _, kind_a, kind_b = _TEMPLATES[op]
+        count = max(count, c + 1)
+        if kind_a == 'r':
+            count = max(count, a + 1)
+        if kind_b == 'r':
+            count = max(count, b + 1)
+    return count
+
+
+def _translate_block(program: Program, start: int, breakpoints: FrozenSet[int], indent: str) -> List[str]:
+    """Emits straight-line code for the instructions starting at `start`.
+
+    Inside a block the instruction pointer is known, so reads of the bound register become constants.
+    The block ends on the first instruction that writes the bound register, which becomes
+    a real jump by assigning the new `ip`.
+    """
+
+    ip_register = program.ip_register
+    size = len(program.ops)
+    lines: List[str] = []
+    idx = start
+    while True:
+        template, kind_a, kind_b = _TEMPLATES[program.ops[idx]]
+        operands = {}
+        static = True
+        for name, kind, value in (('a', kind_a, program.a[idx]), ('b', kind_b, program.b[idx])):
+            if kind == 'r' and value != ip_register:
+                operands[name] = 'r{}'.format(value)
+                static = False
+            else:
+                operands[name] = str(idx if kind == 'r' else value)
+        expression = template.format(**operands)
+        target = program.c[idx]
+        if target == ip_register:
+            if static:
+                # A jump with a known destination, so the breakpoint check can be settled now.
+                destination = eval(expression) + 1
+                lines.append('{}ip = {}'.format(indent, destination))
+                if destination in breakpoints:
+                    lines.append('{}break'.format(indent))
+            else:
+                lines.append('{}ip = ({}) + 1'.format(indent, expression))
+                if breakpoints:
+                    lines.append('{}if ip in {!r}: break'.format(indent, set(breakpoints)))
+            return lines
+        lines.append('{}r{} = {}'.format(indent, target, expression))
+        idx += 1
+        # Breakpoints come first, a block cut short at the end or the length limit may still stop on one.
+        if idx in breakpoints:
+            lines.append('{}ip = {}'.format(indent, idx))
+            lines.append('{}break'.format(indent))
+            return lines
+        if idx >= size or idx - start >= _MAX_BLOCK:
+            lines.append('{}ip = {}'.format(indent, idx))
+            return lines
+
+
+def _translate_dispatch(program: Program, lo: int, hi: int, breakpoints: FrozenSet[int], indent: str) -> List[str]:
+    # Binary search over the block entry points, so dispatch costs log2(n) comparisons.
+    if hi - lo == 1:
+        return _translate_block(program, lo, breakpoints, indent)
+    mid = (lo + hi) // 2
+    lines = ['{}if ip < {}:'.format(indent, mid)]
+    lines.extend(_translate_dispatch(program, lo, mid, breakpoints, indent + '    '))
+    lines.append('{}else:'.format(indent))
+    lines.extend(_translate_dispatch(program, mid, hi, breakpoints, indent + '    '))
+    return lines
+
+
+def translate_program(program: Program, breakpoints: Iterable[int] = ()) -> str:
+    """Translates the program into the source of an equivalent Python function.
+
+    Every instruction is a possible jump target, so each one starts a basic block that runs
+    straight through until the next write to the instruction pointer register.
+    Registers are held in locals while the function runs, and written back when it returns.
+
+    Arguments:
+        program {Program} -- The program to translate.
+
+    Keyword Arguments:
+        breakpoints {Iterable[int]} -- Instruction pointers to return at (default: {()})
+
+    Returns:
+        str -- Source code defining a function named `elfcode_program`.
+    """
+
+    points = frozenset(breakpoints)
+    num_registers = _register_count(program)
+    ip_register = program.ip_register
+    lines = ['def elfcode_program(regs):']
+    for idx in range(num_registers):
+        if idx != ip_register:
+            lines.append('    r{0} = regs[{0}]'.format(idx))
+    lines.append('    ip = regs[{}]'.format(ip_register))
+    lines.append('    while 0 <= ip < {}:'.format(len(program.ops)))
+    lines.extend(_translate_dispatch(program, 0, len(program.ops), points, '        '))
+    for idx in range(num_registers):
+        if idx != ip_register:
+            lines.append('    regs[{0}] = r{0}'.format(idx))
+    lines.append('    regs[{}] = ip'.format(ip_register))
+    return '\n'.join(lines) + '\n'
+
+
+def compile_program(program: Program, breakpoints: Iterable[int] = ()) -> Callable[[Registers], None]:
+    """Compiles the program into a Python function that runs it on a register list in place.
+
+    The function behaves like `run`, it stops when the instruction pointer leaves the program,
+    or when it jumps to one of the `breakpoints`. Calling it again resumes from that instruction.
+    Compiled functions are cached, so repeat calls with the same program are free.
+
+    Arguments:
+        program {Program} -- The program to compile.
+
+    Keyword Arguments:
+        breakpoints {Iterable[int]} -- Instruction pointers to return at (default: {()})
+
+    Returns:
+        Callable[[Registers], None] -- The compiled program.
+    """
+
+    points = frozenset(breakpoints)
+    key = (program.ip_register, program.ops.tobytes(), program.a.tobytes(),
+           program.b.tobytes(), program.c.tobytes(), points)
+    if key not in _compiled:
+        namespace: Dict[str, Any] = {}
+        code = compile(translate_program(program, points), '<elfcode>', 'exec')
+        exec(code, namespace)
+        _compiled[key] = namespace['elfcode_program']
+    return _compiled[key]
+
+
+class Profile:
+    """Execution counts gathered by `profile`.
+
+    Counters live in flat `array('Q')`s, `counts[ip]` is how often each instruction ran,
+    `back_edges[tail * size + head]` how often `tail` jumped back to `head`, and in detailed mode
+    `writes[ip * num_registers + r]` how often instruction `ip` actually changed register `r`.
+    """
+
+    def __init__(self, program: Program, num_registers: int, detailed: bool):
+        self.program = program
+        self.num_registers = num_registers
+        self.detailed = detailed
+        size = len(program.ops)
+        self.counts = array('Q', bytes(8 * size))
+        self.back_edges = array('Q', bytes(8 * size * size))
+        self.writes = array('Q', bytes(8 * size * num_registers if detailed else 0))
+        self.steps = 0
+
+    def hot_instructions(self, top: int = 10) -> List[Tuple[int, int]]:
+        """The most executed instructions, as (ip, count) pairs."""
+        ranked = sorted(enumerate(self.counts), key=lambda x: x[1], reverse=True)
+        return [(ip, count) for ip, count in ranked[:top] if count]
+
+    def hot_loops(self) -> List[Tuple[Tuple[int, int], int]]:
+        """Every backwards jump taken, as ((head, tail), count) pairs, hottest first."""
+        size = len(self.program.ops)
+        loops = [((idx % size, idx // size), count) for idx, count in enumerate(self.back_edges) if count]
+        return sorted(loops, key=lambda x: x[1], reverse=True)
+
+    def register_writes(self, ip: int) -> Dict[int, int]:
+        """How often instruction `ip` changed each register, only available in detailed mode."""
+        if not self.detailed:
+            raise ValueError('Register writes are only recorded by a detailed profile.')
+        start = ip * self.num_registers
+        return {r: count for r, count in enumerate(self.writes[start:start + self.num_registers]) if count}
+
+    def touching(self, register: int) -> List[int]:
+        """The instructions that ran and read or wrote `register`."""
+        program = self.program
+        result = []
+        for ip, count in enumerate(self.counts):
+            if not count:
+                continue
+            _, kind_a, kind_b = _TEMPLATES[program.ops[ip]]
+            if (program.c[ip] == register or (kind_a == 'r' and program.a[ip] == register) or
+                    (kind_b == 'r' and program.b[ip] == register)):
+                result.append(ip)
+        return result
+
+    def report(self, top: int = 10) -> str:
+        """A short human readable summary of the hottest instructions and loops."""
+        program = self.program
+        lines = ['{} instructions executed'.format(self.steps)]
+        for ip, count in self.hot_instructions(top):
+            name = OPERATIONS[program.ops[ip]].__name__
+            line = '{:>4} {} {} {} {}: {}'.format(ip, name, program.a[ip], program.b[ip], program.c[ip], count)
+            if self.detailed:
+                line += ' writes {}'.format(self.register_writes(ip))
+            lines.append(line)
+        for (head, tail), count in self.hot_loops()[:top]:
+            lines.append('loop {} -> {}: {}'.format(tail, head, count))
+        return '\n'.join(lines)
+
+
+def profile(program: Program, registers: Registers, steps: Optional[int] = None, breakpoint: Optional[int] = None,
+            shortcuts: Optional[Dict[int, Shortcut]] = None, detailed: bool = False) -> Profile:
+    """Runs the program like `run`, counting what it does along the way.
+
+    The default mode only counts instructions and back edges, `detailed` also tracks which
+    registers every instruction changes, which is slower.
+    A shortcut is counted as a single execution of its loop head.
+
+    Arguments:
+        program {Program} -- The program to profile.
+        registers {Registers} -- The registers, these are modified in place.
+
+    Keyword Arguments:
+        steps {Optional[int]} -- Stop after this many instructions (default: {None})
+        breakpoint {Optional[int]} -- Instruction pointer to stop at (default: {None})
+        shortcuts {Optional[Dict[int, Shortcut]]} -- Loop replacements keyed by loop head (default: {None})
+        detailed {bool} -- Record register write histograms too (default: {False})
+
+    Returns:
+        Profile -- The gathered counts.
+    """
+
+    ip_register = program.ip_register
+    if shortcuts is None:
+        shortcuts = {}
+    num_registers = len(registers)
+    result = Profile(program, num_registers, detailed)
+    counts, back_edges, writes = result.counts, result.back_edges, result.writes
+    size = len(program.ops)
+    regs = registers
+    executed = 0
+    ip = regs[ip_register]
+    while 0 <= ip < size and executed != steps:
+        counts[ip] += 1
+        executed += 1
+        if ip in shortcuts:
+            if detailed:
+                before = list(regs)
+            target = shortcuts[ip](regs)
+        else:
+            op = program.ops[ip]
+            if detailed:
+                before = list(regs)
+            OPERATIONS[op](regs, program.a[ip], program.b[ip], program.c[ip])
+            target = regs[ip_register] + 1
+        if detailed:
+            offset = ip * num_registers
+            for r in range(num_registers):
+                if regs[r] != before[r]:
+                    writes[offset + r] += 1
+        regs[ip_register] = target
+        if 0 <= target <= ip:
+            back_edges[ip * size + target] += 1
+        ip = target
+        if ip == breakpoint:
+            break
+    result.steps = executed
+    return result
+
+
+# Loop shapes that can be replaced by a direct computation.
+# Upper case names are registers, lower case names are immediate values, `IP` is the bound register
+# and `HEAD` is the jump back to the first instruction of the loop, `HEAD+1` to the one after that.
+# None marks an ignored operand.
+# Any register may be used for each name, so the same shape matches everyone's input.
+LoopPattern = List[Tuple[str, Any, Any, Any]]
+
+# for K in range(K, max(K, N) + 1): if X * K == N: ACC += X
+_DIVISOR_SCAN: LoopPattern = [
+    ('mulr', 'X', 'K', 'T'),
+    ('eqrr', 'T', 'N', 'T'),
+    ('addr', 'T', 'IP', 'IP'),
+    ('addi', 'IP', 1, 'IP'),
+    ('addr', 'X', 'ACC', 'ACC'),
+    ('addi', 'K', 1, 'K'),
+    ('gtrr', 'K', 'N', 'T'),
+    ('addr', 'IP', 'T', 'IP'),
+    ('seti', 'HEAD', None, 'IP'),
+]
+
+# The divisor scan wrapped in a loop over X, adding up every divisor of N from X upwards.
+_DIVISOR_SUM: LoopPattern = [
+    ('seti', 1, None, 'K'),
+    ('mulr', 'X', 'K', 'T'),
+    ('eqrr', 'T', 'N', 'T'),
+    ('addr', 'T', 'IP', 'IP'),
+    ('addi', 'IP', 1, 'IP'),
+    ('addr', 'X', 'ACC', 'ACC'),
+    ('addi', 'K', 1, 'K'),
+    ('gtrr', 'K', 'N', 'T'),
+    ('addr', 'IP', 'T', 'IP'),
+    ('seti', 'HEAD+1', None, 'IP'),
+    ('addi', 'X', 1, 'X'),
+    ('gtrr', 'X', 'N', 'T'),
+    ('addr', 'T', 'IP', 'IP'),
+    ('seti', 'HEAD', None, 'IP'),
+]
+
+# while (K + 1) * m <= L: K += 1
+_DIVISION_SCAN: LoopPattern = [
+    ('addi', 'K', 1, 'T'),
+    ('muli', 'T', 'm', 'T'),
+    ('gtrr', 'T', 'L', 'T'),
+    ('addr', 'T', 'IP', 'IP'),
+    ('addi', 'IP', 1, 'IP'),
+    ('seti', 'e', None, 'IP'),
+    ('addi', 'K', 1, 'K'),
+    ('seti', 'HEAD', None, 'IP'),
+]
+
+# Operations where swapping A and B gives the same result.
+_COMMUTATIVE = {'addr', 'mulr', 'banr', 'borr', 'eqrr'}
+
+
+def _match_operand(pattern: Any, value: int, is_register: bool, head: int, bindings: Dict[str, int]) -> bool:
+    if pattern is None:
+        return True
+    if isinstance(pattern, int):
+        return not is_register and value == pattern
+    if pattern == 'HEAD':
+        return not is_register and value == head - 1
+    if pattern == 'HEAD+1':
+        return not is_register and value == head
+    if pattern.isupper() != is_register:
+        return False
+    if pattern in bindings:
+        return bindings[pattern] == value
+    # Two register names never share a register, otherwise the summary would be wrong.
+    if is_register and value in (v for k, v in bindings.items() if k.isupper()):
+        return False
+    bindings[pattern] = value
+    return True
+
+
+def _match_loop(program: Program, head: int, tail: int, pattern: LoopPattern) -> Optional[Dict[str, int]]:
+    if tail - head + 1 != len(pattern):
+        return None
+    bindings = {'IP': program.ip_register}
+    for idx, (name, pa, pb, pc) in zip(range(head, tail + 1), pattern):
+        if OPERATIONS[program.ops[idx]].__name__ != name:
+            return None
+        _, kind_a, kind_b = _TEMPLATES[program.ops[idx]]
+        a, b, c = program.a[idx], program.b[idx], program.c[idx]
+        orders = [(pa, pb), (pb, pa)] if name in _COMMUTATIVE else [(pa, pb)]
+        for qa, qb in orders:
+            attempt = dict(bindings)
+            if (_match_operand(qa, a, kind_a == 'r', head, attempt) and
+                    _match_operand(qb, b, kind_b == 'r', head, attempt) and
+                    _match_operand(pc, c, True, head, attempt)):
+                bindings = attempt
+                break
+        else:
+            return None
+    return bindings
+
+
+def _divisor_scan(head: int, tail: int, r: Dict[str, int]) -> Optional[Shortcut]:
+    x, k, t, n, acc = r['X'], r['K'], r['T'], r['N'], r['ACC']
+    exit_ip = tail + 1
+
+    def shortcut(regs: Registers) -> int:
+        last = max(regs[k], regs[n])
+        if regs[x] and not regs[n] % regs[x] and regs[k] <= regs[n] // regs[x] <= last:
+            regs[acc] += regs[x]
+        regs[k] = last + 1
+        regs[t] = 1
+        return exit_ip
+    return shortcut
+
+
+def _divisor_sum(head: int, tail: int, r: Dict[str, int]) -> Optional[Shortcut]:
+    x, k, t, n, acc = r['X'], r['K'], r['T'], r['N'], r['ACC']
+    exit_ip = tail + 1
+
+    def shortcut(regs: Registers) -> int:
+        start, target = regs[x], regs[n]
+        if target < 1:
+            # The inner loop only ever runs with K = 1, so X * K hits N once X counts up to it.
+            if start <= target:
+                regs[acc] += target
+        else:
+            start = max(start, 1)
+            total = 0
+            factor = 1
+            while factor * factor <= target:
+                if not target % factor:
+                    for divisor in {factor, target // factor}:
+                        if divisor >= start:
+                            total += divisor
+                factor += 1
+            regs[acc] += total
+        regs[x] = max(regs[x], target) + 1
+        regs[k] = max(1, target) + 1
+        regs[t] = 1
+        return exit_ip
+    return shortcut
+
+
+def _division_scan(head: int, tail: int, r: Dict[str, int]) -> Optional[Shortcut]:
+    k, t, m, l = r['K'], r['T'], r['m'], r['L']
+    exit_ip = r['e'] + 1
+    if m <= 0:
+        return None
+
+    def shortcut(regs: Registers) -> int:
+        regs[k] = max(regs[k], regs[l] // m)
+        regs[t] = 1
+        return exit_ip
+    return shortcut
+
+
+_LOOP_SUMMARIES: List[Tuple[LoopPattern, Callable[[int, int, Dict[str, int]], Optional[Shortcut]]]] = [
+    (_DIVISOR_SCAN, _divisor_scan),
+    (_DIVISOR_SUM, _divisor_sum),
+    (_DIVISION_SCAN, _division_scan),
+]
+
+
+def find_hot_loops(program: Program, registers: Registers, steps: int = 10000,
+                   shortcuts: Optional[Dict[int, Shortcut]] = None) -> Dict[Tuple[int, int], int]:
+    """Profiles the program for a little while, counting how often each backwards jump is taken.
+
+    The registers are copied, so this doesn't disturb the real run.
+
+    Arguments:
+        program {Program} -- The program to profile.
+        registers {Registers} -- The registers to start from.
+
+    Keyword Arguments:
+        steps {int} -- How many instructions to profile for (default: {10000})
+        shortcuts {Optional[Dict[int, Shortcut]]} -- Loops that have already been replaced (default: {None})
+
+    Returns:
+        Dict[Tuple[int, int], int] -- Back edge counts keyed by (loop head, loop tail).
+    """
+
+    gathered = profile(program, list(registers), steps=steps, shortcuts=shortcuts)
+    return dict(gathered.hot_loops())
+
+
+def summarize_loop(program: Program, head: int, tail: int) -> Optional[Shortcut]:
+    """Tries to replace the loop between `head` and `tail` with an equivalent computation.
+
+    Arguments:
+        program {Program} -- The program containing the loop.
+        head {int} -- First instruction of the loop.
+        tail {int} -- The instruction that jumps back to `head`.
+
+    Returns:
+        Optional[Shortcut] -- The replacement, or None if the loop isn't one we understand.
+    """
+
+    for pattern, summary in _LOOP_SUMMARIES:
+        bindings = _match_loop(program, head, tail, pattern)
+        if bindings is not None:
+            return summary(head, tail, bindings)
+    return None
+
+
+def find_shortcuts(program: Program, registers: Registers, steps: int = 10000, threshold: int = 100) -> Dict[int, Shortcut]:
+    """Profiles the program, and replaces every hot loop that `summarize_loop` understands.
+
+    Profiling is repeated with the loops found so far already replaced, so once an inner loop
+    is gone the loop around it gets hot enough to be picked up too.
+    The result is meant to be passed to `run`, which then skips straight past those loops.
+
+    Arguments:
+        program {Program} -- The program to accelerate.
+        registers {Registers} -- The registers the real run will start from.
+
+    Keyword Arguments:
+        steps {int} -- How many instructions to profile for (default: {10000})
+        threshold {int} -- How many times a loop has to repeat to count as hot (default: {100})
+
+    Returns:
+        Dict[int, Shortcut] -- Shortcuts keyed by loop head.
+    """
+
+    shortcuts: Dict[int, Shortcut] = {}
+    tried: Set[Tuple[int, int]] = set()
+    while True:
+        hot_loops = [loop for loop, count in find_hot_loops(program, registers, steps, shortcuts).items()
+                     if count >= threshold and loop not in tried]
+        if not hot_loops:
+            return shortcuts
+        for head, tail in hot_loops:
+            tried.add((head, tail))
+            shortcut = summarize_loop(program, head, tail)
+            if shortcut is not None:
+                shortcuts[head] = shortcut
@@ -0,0 +1,50 @@
+"""Loading for puzzle inputs that are nothing but signed integers.
+
+Day 1 has one change per line and day 8 a single line of space separated numbers, either
+way splitting the raw bytes on whitespace finds every number. They're packed straight into
+an array('q'), 8 bytes each, instead of a list of strings and then a list of ints.
+"""
+
+import mmap
+from array import array
+from typing import Iterator
+
+
+def _tokens(buffer: mmap.mmap, chunk_size: int) -> Iterator[bytes]:
+    """Splits a buffer on whitespace a chunk at a time, carrying numbers cut at a chunk edge over to the next."""
+    carry = b''
+    for start in range(0, len(buffer), chunk_size):
+        chunk = carry + buffer[start:start + chunk_size]
+        tokens = chunk.split()
+        carry = b''
+        if tokens and not chunk[-1:].isspace():
+            carry = tokens.pop()
+        yield from tokens
+    if carry:
+        yield carry
+
+
+def load_ints(path: str, use_mmap: bool = False, chunk_size: int = 1 << 20) -> array:
+    """Reads every whitespace separated integer in a file, with or without a leading sign.
+
+    Arguments:
+        path {str} -- The input file.
+
+    Keyword Arguments:
+        use_mmap {bool} -- Map the file and parse it a chunk at a time, rather than
+                    reading it all into memory first, for very large files (default: {False})
+        chunk_size {int} -- Bytes parsed at a time when mapped (default: {1 << 20})
+
+    Returns:
+        array -- The numbers, as an array('q').
+    """
+
+    with open(path, 'rb') as f:
+        if not use_mmap:
+            return array('q', map(int, f.read().split()))
+        values = array('q')
+        # Empty files can't be mapped.
+        if f.seek(0, 2):
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                values.extend(map(int, _tokens(buffer, chunk_size)))
+        return values
@@ -0,0 +1,55 @@
+from elfcode import _MAX_BLOCK, compile_program, parse_program, run, summarize_loop
+
+
+def test_compiled_breakpoint_at_block_limit():
+    # A straight run longer than one block, with the breakpoint right where the block gets cut.
+    lines = ['#ip 5'] + ['addi 0 1 0'] * (_MAX_BLOCK + 6)
+    program = parse_program(lines)
+
+    interpreted = [0] * 6
+    run(program, interpreted, breakpoint=_MAX_BLOCK)
+    compiled = [0] * 6
+    compile_program(program, breakpoints=(_MAX_BLOCK,))(compiled)
+
+    assert interpreted[0] == compiled[0] == _MAX_BLOCK
+    assert interpreted[5] == compiled[5] == _MAX_BLOCK
+
+
+# Day 19's divisor sum, the loop runs from instruction 2 to 15 and exits to 16.
+DIVISOR_SUM = '''#ip 3
+addi 3 16 3
+seti 1 8 1
+seti 1 3 4
+mulr 1 4 2
+eqrr 2 5 2
+addr 2 3 3
+addi 3 1 3
+addr 1 0 0
+addi 4 1 4
+gtrr 4 5 2
+addr 3 2 3
+seti 2 6 3
+addi 1 1 1
+gtrr 1 5 2
+addr 2 3 3
+seti 1 1 3
+seti 99 0 3'''.split('\n')
+
+
+def test_divisor_sum_shortcut_matches_interpreter():
+    program = parse_program(DIVISOR_SUM)
+    shortcut = summarize_loop(program, 2, 15)
+    assert shortcut is not None
+    # Targets below 1 only run the inner loop with K = 1, including X counting up from below N.
+    for x, n in [(-3, -1), (-1, -1), (0, -1), (2, -1), (-5, 0), (1, 12), (4, 12), (13, 12)]:
+        interpreted = [0, x, 0, 2, 0, n]
+        run(program, interpreted, breakpoint=16)
+        summarized = [0, x, 0, 2, 0, n]
+        summarized[3] = shortcut(summarized)
+        assert interpreted == summarized
+
+
+def test_program_is_a_plain_named_tuple():
+    program = parse_program(DIVISOR_SUM)
+    assert len(program) == 5
+    assert program._replace(ip_register=1).ip_register == 1